@@ -5,7 +5,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Protocol
 
-from loguru import logger
+from .tool_registry import Middleware, ToolRegistry
 
 
 @dataclass
@@ -27,18 +27,30 @@ class Tool(Protocol):
 
 
 class BaseAgent:
-  """Base class that provides logging and tool access."""
+  """Base class that provides logging and tool access.
 
-  def __init__(self, name: str, tools: Optional[List[Tool]] = None) -> None:
+  Tool calls go through ``self.registry``; ``middleware`` replaces the default chain (error
+  translation and timing), and ``registry.use`` adds more, e.g. per-tool caching or limits.
+  """
+
+  def __init__(self, name: str, tools: Optional[List[Tool]] = None,
+               middleware: Optional[List[Middleware]] = None) -> None:
     self.name = name
-    self.tools = tools or []
+    self.registry = ToolRegistry(tools or [], middleware)
+
+  @property
+  def tools(self) -> List[Tool]:
+    return list(self.registry)
+
+  def has_tool(self, tool_name: str) -> bool:
+    return tool_name in self.registry
 
   def dispatch_tool(self, tool_name: str, *args, **kwargs) -> Any:
-    for tool in self.tools:
-      if tool.name == tool_name:
-        logger.debug(f"{self.name} invoking tool {tool_name}")
-        return tool.run(*args, **kwargs)
-    raise ValueError(f"Tool {tool_name} not registered for {self.name}")
+    return self.registry.invoke(self.name, tool_name, *args, **kwargs)
+
+  async def adispatch_tool(self, tool_name: str, *args, **kwargs) -> Any:
+    """Awaitable dispatch: async tools are awaited, synchronous ones run in a worker thread."""
+    return await self.registry.ainvoke(self.name, tool_name, *args, **kwargs)
 
   def think(self, message: AgentMessage) -> AgentMessage:
     raise NotImplementedError("Agents must implement think()")
@@ -10,7 +10,11 @@ from .base_agent import AgentMessage, BaseAgent
 
 
 class CodeEvaluationAgent(BaseAgent):
-  """Runs lint/tests and reports pass/fail back to orchestrator."""
+  """Runs lint/tests and reports pass/fail back to orchestrator.
+
+  The check runs through the synchronous ``command_executor`` call and holds this task's
+  orchestrator worker until it exits (see ``CommandExecutor.run``).
+  """
 
   def think(self, message: AgentMessage) -> AgentMessage:
     command = message.metadata.get("command", "npm run test")
@@ -25,6 +29,10 @@ class CodeEvaluationAgent(BaseAgent):
         "stdout": result.get("stdout"),
         "stderr": result.get("stderr"),
         "returncode": result.get("returncode"),
+        "timed_out": result.get("timed_out", False),
+        "cancelled": result.get("cancelled", False),
+        "wall_time": result.get("wall_time"),
+        "cpu_time": result.get("cpu_time"),
     }
     return AgentMessage(
         sender=self.name,
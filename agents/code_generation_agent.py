@@ -2,10 +2,16 @@
 
 from __future__ import annotations
 
+import json
 from typing import Any, Dict, List
 
 from loguru import logger
 
+from tools.json_stream import JSONArrayStream
+from tools.metrics import FALLBACKS
+from tools.paper_records import PaperCollector
+from tools.resilience import check_deadline
+
 from .base_agent import AgentMessage, BaseAgent
 
 
@@ -25,8 +31,37 @@ class CodeGenerationAgent(BaseAgent):
     logger.debug(f"Executing instruction: {instruction}")
     actions: List[Dict[str, Any]] = metadata.get("actions", [])
     files_touched: List[str] = []
+    # File writes of one task are staged and renamed into place together on commit.
+    self.dispatch_tool("file_manager", "begin")
+    try:
+      self._apply_actions(actions, files_touched)
+      # A task cancelled or out of time while its last action ran must not publish that action's output.
+      check_deadline(f"{self.name} commit")
+    except BaseException:
+      self.dispatch_tool("file_manager", "rollback")
+      raise
+    logger.info(f"File batch {self.dispatch_tool('file_manager', 'commit')}")
 
+    notes = "Executed scripted actions" if actions else "No actions provided; task recorded only."
+    return {
+        "task_id": metadata.get("task_id"),
+        "status": "completed",
+        "notes": notes,
+        "files_touched": files_touched,
+    }
+
+  def _run_script(self, command: str) -> Dict[str, Any]:
+    """Scripts read the workspace, so staged writes are flushed before they run."""
+    self.dispatch_tool("file_manager", "commit")
+    try:
+      return self.dispatch_tool("command_executor", command)
+    finally:
+      self.dispatch_tool("file_manager", "begin")
+
+  def _apply_actions(self, actions: List[Dict[str, Any]], files_touched: List[str]) -> None:
     for action in actions:
+      # Cancellation point between actions; a task past its deadline stops here and rolls back.
+      check_deadline(f"{self.name} action")
       op = action.get("operation")
       path = action.get("path")
       if op in {"write", "append"}:
@@ -42,58 +77,46 @@ class CodeGenerationAgent(BaseAgent):
         if not command:
           logger.warning(f"Skipping script action without command: {action}")
           continue
-        result = self.dispatch_tool("command_executor", command)
+        result = self._run_script(command)
         logger.info(f"Executed script {command} -> code {result.get('returncode')}")
         files_touched.append(action.get("description", command))
       elif op == "llm":
-        prompt = action.get("prompt")
+        prompts = action.get("prompts") or ([action["prompt"]] if action.get("prompt") else [])
         target_path = action.get("path")
         fallback_script = action.get("fallback_script")
-        if not prompt or not target_path:
+        if not prompts or not target_path:
           logger.warning(f"Skipping LLM action without prompt/path: {action}")
           continue
-        logger.info(f"🚀 Attempting LLM generation for {target_path}")
+        logger.info(f"🚀 Attempting LLM generation for {target_path} ({len(prompts)} shard(s))")
         try:
-          completion = self.dispatch_tool("llm_client", prompt)
-          # 清理 LLM 输出：移除 markdown 代码块标记
-          cleaned = completion.strip()
-          if cleaned.startswith("```"):
-            # 移除开头的 ```json 或 ```
-            lines = cleaned.split("\n")
-            if lines[0].startswith("```"):
-              lines = lines[1:]
-            # 移除结尾的 ```
-            if lines and lines[-1].strip() == "```":
-              lines = lines[:-1]
-            cleaned = "\n".join(lines)
-          
-          # 验证并清理 JSON
-          import json
-          try:
-            data = json.loads(cleaned)
-            # 去重：基于 title 和 id
-            seen = set()
-            unique_data = []
-            for item in data:
-              key = (item.get("id"), item.get("title"))
-              if key not in seen and key[0] and key[1]:
-                seen.add(key)
-                unique_data.append(item)
-            
-            if len(unique_data) < len(data):
-              logger.info(f"Removed {len(data) - len(unique_data)} duplicate papers")
-            
-            cleaned = json.dumps(unique_data, indent=2, ensure_ascii=False)
-          except json.JSONDecodeError as e:
-            logger.warning(f"JSON parsing failed, writing raw content: {e}")
-          
-          self.dispatch_tool("file_manager", "write", target_path, cleaned)
-          logger.info(f"✅ LLM generated {len(unique_data) if 'unique_data' in locals() else 'unknown'} unique papers written to {target_path}")
+          papers = self._generate_papers(prompts, action.get("cache_ttl"))
+          if self.has_tool("paper_repository"):
+            # SQLite writes are not part of the staged file batch, so check before touching the archive.
+            check_deadline("Paper archive upsert")
+            # 只把差异（新增/变更/退役）写入 SQLite 归档，有变化时再导出完整 JSON 供 Vite 构建使用
+            counts = self.dispatch_tool("paper_repository", "upsert", papers,
+                                        retire_before=action.get("retire_before"))
+            logger.info(f"Archived LLM papers: {counts}")
+            changed = counts["inserted"] + counts["updated"] + counts["retired"]
+            content = self.dispatch_tool("paper_repository", "export") if changed else None
+          else:
+            content = json.dumps(papers, indent=2, ensure_ascii=False)
+          if content is None:
+            logger.info(f"✅ LLM generated {len(papers)} papers, archive already up to date")
+            continue
+          self.dispatch_tool("file_manager", "write", target_path, content)
+          logger.info(f"✅ LLM generated {len(papers)} unique papers written to {target_path}")
           files_touched.append(target_path)
+          if self.has_tool("paper_shards"):
+            # 同一批次内发布按日期/分类切分的静态分片，前端按需加载
+            self.dispatch_tool("paper_shards", "publish", json.loads(content))
         except Exception as e:
+          # Out of time or cancelled: the fallback would not get to run either.
+          check_deadline("LLM fallback")
           logger.warning(f"LLM call failed: {e}. Falling back to script method.")
+          FALLBACKS.inc(path=target_path)
           if fallback_script:
-            result = self.dispatch_tool("command_executor", fallback_script)
+            result = self._run_script(fallback_script)
             logger.info(f"Fallback script executed: {fallback_script} -> code {result.get('returncode')}")
             files_touched.append(fallback_script)
           else:
@@ -101,12 +124,43 @@ class CodeGenerationAgent(BaseAgent):
       else:
         logger.warning(f"Unknown action operation {op}")
 
-    notes = "Executed scripted actions" if actions else "No actions provided; task recorded only."
-    return {
-        "task_id": metadata.get("task_id"),
-        "status": "completed",
-        "notes": notes,
-        "files_touched": files_touched,
-    }
+  def _generate_papers(self, prompts: List[str], cache_ttl: Any) -> List[Dict[str, Any]]:
+    """Stream every shard through an incremental parser, keeping each complete paper on arrival."""
+    corpus = self.dispatch_tool("paper_repository", "near_duplicates") if self.has_tool("paper_repository") else None
+    collector = PaperCollector(corpus)
+    parsers = [JSONArrayStream() for _ in prompts]
+    accepted = [0] * len(prompts)
+
+    def on_chunk(index: int, delta: str) -> None:
+      for item in parsers[index].feed(delta):
+        if collector.add(item):
+          accepted[index] += 1
 
+    def validate(index: int, content: str) -> bool:
+      # Only a closed array that yielded usable papers is worth caching for the next retry.
+      return parsers[index].done and accepted[index] > 0
+
+    try:
+      if len(prompts) == 1:
+        self.dispatch_tool("llm_client", prompts[0], cache_ttl=cache_ttl,
+                           on_chunk=lambda delta: on_chunk(0, delta),
+                           validate=lambda content: validate(0, content))
+      else:
+        self.dispatch_tool("llm_client", prompts, cache_ttl=cache_ttl, on_chunk=on_chunk, validate=validate)
+    except Exception as e:
+      # A cancelled or timed-out stream is abandoned, not truncated: keep nothing from it.
+      check_deadline("LLM stream")
+      # 响应被截断或中途失败：保留已经完整解析的论文
+      if not collector.papers:
+        raise
+      logger.warning(f"LLM stream ended early ({e}); keeping {len(collector.papers)} complete papers")
 
+    truncated = sum(1 for parser in parsers if parser.started and not parser.done)
+    if truncated:
+      logger.warning(f"{truncated} shard(s) ended before the JSON array closed")
+    if collector.duplicates or collector.near_duplicates or collector.invalid:
+      logger.info(f"Removed {collector.duplicates} duplicate, {collector.near_duplicates} near-duplicate "
+                  f"and {collector.invalid} invalid papers")
+    if not collector.papers:
+      raise ValueError("LLM response contained no valid paper objects")
+    return collector.papers
@@ -2,13 +2,37 @@
 
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass, field
-from datetime import datetime
-from typing import Any, Dict, List
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 
 from loguru import logger
 
-from .base_agent import AgentMessage, BaseAgent
+from .base_agent import AgentMessage, BaseAgent, Tool
+
+PAPER_PROMPT = (
+    "Generate a JSON array with {count} unique arXiv-style computer science papers. "
+    "Each object must have: id (unique, format like 2512.12345 for December 2025 papers), "
+    "title (unique, no duplicates), authors (array of 2-5 author names), "
+    "submittedAt (YYYY-MM-DD, MUST include today's date {today} for at least one paper, "
+    "and use recent dates from the last 2-3 months), "
+    "abstract (2-3 sentences), categories (array of 1-3 cs.* tags like cs.AI, cs.CV, cs.LG, cs.AR, cs.CL, cs.SE, cs.CC), "
+    "and pdfUrl (format: https://arxiv.org/pdf/{{id}}.pdf). "
+    "IMPORTANT: At least 2-3 papers must have today's date ({today}). "
+    "Ensure all papers are unique with different titles, IDs, and varied submission dates. "
+    "{shard_rule}"
+    "Return ONLY valid JSON array, no markdown code blocks."
+)
+# Seconds each planned task may take (metadata["timeout"]); the orchestrator fails it after that.
+DEFAULT_TASK_TIMEOUTS: Dict[str, float] = {
+    "plan-frontend": 60,
+    # LLM call with retries (LLM_DEADLINE) plus the mock generator fallback.
+    "plan-data": 420,
+    "plan-detail-page": 120,
+    # npm run build.
+    "plan-tests": 900,
+}
 
 
 @dataclass
@@ -24,6 +48,15 @@ class PlannedTask:
 class PlanningAgent(BaseAgent):
   """Simple heuristic planner (can be replaced with LLM-backed workflow later)."""
 
+  def __init__(self, name: str, tools: Optional[List[Tool]] = None, papers_per_run: int = 15,
+               shard_size: int = 25, retain_days: Optional[int] = None,
+               task_timeouts: Optional[Dict[str, float]] = None) -> None:
+    super().__init__(name, tools)
+    self.papers_per_run = papers_per_run
+    self.shard_size = shard_size
+    self.retain_days = retain_days
+    self.task_timeouts = {**DEFAULT_TASK_TIMEOUTS, **(task_timeouts or {})}
+
   def think(self, message: AgentMessage) -> AgentMessage:
     logger.info(f"PlanningAgent received brief from {message.sender}")
     tasks = self._draft_plan(message.content)
@@ -35,6 +68,33 @@ class PlanningAgent(BaseAgent):
     logger.debug(f"Planner produced {len(tasks)} tasks")
     return response
 
+  def _paper_prompts(self) -> List[str]:
+    """Split the daily paper request into shards small enough for one completion each."""
+    today = datetime.now().strftime("%Y-%m-%d")
+    shards = max(1, math.ceil(self.papers_per_run / self.shard_size))
+    if shards == 1:
+      return [PAPER_PROMPT.format(count=self.papers_per_run, today=today, shard_rule="")]
+    prompts = []
+    width = 90000 // shards
+    for index in range(shards):
+      count = min(self.shard_size, self.papers_per_run - index * self.shard_size)
+      low = 10000 + index * width
+      # Disjoint ID ranges keep shards from colliding on the same arXiv numbers.
+      shard_rule = (f"This is batch {index + 1} of {shards}: the five digits after the dot in every id "
+                    f"must be between {low:05d} and {low + width - 1:05d}. ")
+      prompts.append(PAPER_PROMPT.format(count=count, today=today, shard_rule=shard_rule))
+    return prompts
+
+  def _llm_prompts(self) -> Dict[str, Any]:
+    prompts = self._paper_prompts()
+    return {"prompt": prompts[0]} if len(prompts) == 1 else {"prompts": prompts}
+
+  def _retention(self) -> Dict[str, Any]:
+    """Papers submitted before this date are retired from the archive by the data task."""
+    if not self.retain_days:
+      return {}
+    return {"retire_before": (datetime.now() - timedelta(days=self.retain_days)).strftime("%Y-%m-%d")}
+
   def _draft_plan(self, requirement: str) -> List[PlannedTask]:
     # Placeholder deterministic plan tailored for the assignment requirements.
     logger.debug(f"Drafting plan for requirement: {requirement}")
@@ -45,6 +105,10 @@ class PlanningAgent(BaseAgent):
             description="Create navigation, hero, categories, and feed sections that mirror the reference mockups.",
             owner="code_generation",
             metadata={
+                "timeout": self.task_timeouts["plan-frontend"],
+                # Inputs/outputs let the orchestrator skip a task whose work is already done.
+                "inputs": [],
+                "outputs": ["logs/plan-frontend.md"],
                 "actions": [
                     {
                         "operation": "write",
@@ -60,23 +124,18 @@ class PlanningAgent(BaseAgent):
             description="Implement data fetcher/mock JSON to hydrate homepage + detail pages.",
             owner="code_generation",
             depends_on=["plan-frontend"],
+            # No declared inputs: its input is the LLM, so it runs every time (repeats within a
+            # day are served by the LLM cache, and an unchanged archive leaves papers.json untouched).
             metadata={
+                "timeout": self.task_timeouts["plan-data"],
                 "actions": [
                     {
                         "operation": "llm",
-                        "prompt": (
-                            "Generate a JSON array with 15 unique arXiv-style computer science papers. "
-                            "Each object must have: id (unique, format like 2512.12345 for December 2025 papers), "
-                            "title (unique, no duplicates), authors (array of 2-5 author names), "
-                            "submittedAt (YYYY-MM-DD, MUST include today's date {today} for at least one paper, "
-                            "and use recent dates from the last 2-3 months), "
-                            "abstract (2-3 sentences), categories (array of 1-3 cs.* tags like cs.AI, cs.CV, cs.LG, cs.AR, cs.CL, cs.SE, cs.CC), "
-                            "and pdfUrl (format: https://arxiv.org/pdf/{{id}}.pdf). "
-                            "IMPORTANT: At least 2-3 papers must have today's date ({today}). "
-                            "Ensure all papers are unique with different titles, IDs, and varied submission dates. "
-                            "Return ONLY valid JSON array, no markdown code blocks."
-                        ).format(today=datetime.now().strftime("%Y-%m-%d")),
+                        **self._llm_prompts(),
+                        **self._retention(),
                         "path": "frontend/src/data/papers.json",
+                        # The prompt is dated, so identical retries are only reusable until midnight.
+                        "cache_ttl": "today",
                         "fallback_script": "python scripts/generate_mock_papers.py",
                     },
                 ]
@@ -89,6 +148,9 @@ class PlanningAgent(BaseAgent):
             owner="code_generation",
             depends_on=["plan-data"],
             metadata={
+                "timeout": self.task_timeouts["plan-detail-page"],
+                "inputs": ["scripts/generate_detail_page.py"],
+                "outputs": ["frontend/src/pages/PaperDetail.jsx", "frontend/src/pages/PaperDetail.css"],
                 "actions": [
                     {
                         "operation": "script",
@@ -105,6 +167,10 @@ class PlanningAgent(BaseAgent):
             owner="code_evaluation",
             depends_on=["plan-detail-page"],
             metadata={
+                "timeout": self.task_timeouts["plan-tests"],
+                "inputs": ["frontend/src", "frontend/public", "frontend/index.html", "frontend/package.json",
+                           "frontend/package-lock.json", "frontend/vite.config.js"],
+                "outputs": ["frontend/dist"],
                 "command": "npm run build --prefix frontend",
                 "description": "Ensure React app builds successfully",
             },
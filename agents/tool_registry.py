@@ -0,0 +1,285 @@
+"""Name-indexed tool registry that runs every invocation through a middleware chain."""
+
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from tools.metrics import TOOL_DURATION
+from tools.resilience import Cancelled, DeadlineExceeded
+
+
+class ToolError(RuntimeError):
+  """A tool call failed; the original exception is chained as ``__cause__``."""
+
+  def __init__(self, agent: str, tool: str, error: BaseException) -> None:
+    super().__init__(f"{tool} failed: {type(error).__name__}: {error}")
+    self.agent = agent
+    self.tool = tool
+
+
+@dataclass
+class ToolCall:
+  """One invocation as seen by middleware."""
+
+  # Declared by hand: dataclass(slots=True) needs Python 3.10.
+  __slots__ = ("agent", "name", "tool", "args", "kwargs")
+
+  agent: str
+  name: str
+  tool: Any
+  args: Tuple[Any, ...]
+  kwargs: Dict[str, Any]
+
+
+Handler = Callable[[ToolCall], Any]
+AsyncHandler = Callable[[ToolCall], Awaitable[Any]]
+
+
+class Middleware:
+  """Wraps tool calls. ``handle`` serves dispatch_tool and ``ahandle`` adispatch_tool; both pass
+  the call on unchanged by default."""
+
+  def handle(self, call: ToolCall, proceed: Handler) -> Any:
+    return proceed(call)
+
+  async def ahandle(self, call: ToolCall, proceed: AsyncHandler) -> Any:
+    return await proceed(call)
+
+
+class TranslateErrors(Middleware):
+  """Re-raises tool failures as ToolError naming the agent and tool.
+
+  Cancelled and DeadlineExceeded pass through unwrapped so callers (e.g. the job queue) still see
+  why the task stopped.
+  """
+
+  def handle(self, call: ToolCall, proceed: Handler) -> Any:
+    try:
+      return proceed(call)
+    except (ToolError, Cancelled, DeadlineExceeded):
+      raise
+    except Exception as e:
+      raise ToolError(call.agent, call.name, e) from e
+
+  async def ahandle(self, call: ToolCall, proceed: AsyncHandler) -> Any:
+    try:
+      return await proceed(call)
+    except (ToolError, Cancelled, DeadlineExceeded):
+      raise
+    except Exception as e:
+      raise ToolError(call.agent, call.name, e) from e
+
+
+class Timing(Middleware):
+  """Records ``agent_tool_duration_seconds`` per agent, tool and outcome."""
+
+  def handle(self, call: ToolCall, proceed: Handler) -> Any:
+    logger.debug("{} invoking tool {}", call.agent, call.name)
+    with TOOL_DURATION.time(agent=call.agent, tool=call.name, outcome="error") as labels:
+      result = proceed(call)
+      labels["outcome"] = "ok"
+    return result
+
+  async def ahandle(self, call: ToolCall, proceed: AsyncHandler) -> Any:
+    logger.debug("{} invoking tool {} (async)", call.agent, call.name)
+    with TOOL_DURATION.time(agent=call.agent, tool=call.name, outcome="error") as labels:
+      result = await proceed(call)
+      labels["outcome"] = "ok"
+    return result
+
+
+def _freeze(value: Any) -> Hashable:
+  if isinstance(value, (list, tuple)):
+    return tuple(_freeze(item) for item in value)
+  if isinstance(value, dict):
+    return tuple(sorted((key, _freeze(item)) for key, item in value.items()))
+  if callable(value):
+    raise TypeError("callable arguments are not memoizable")
+  hash(value)
+  return value
+
+
+def argument_key(call: ToolCall) -> Optional[Hashable]:
+  """Default memoization key: tool name plus frozen arguments, or None when they are unhashable."""
+  try:
+    return call.name, _freeze(call.args), _freeze(call.kwargs)
+  except TypeError:
+    return None
+
+
+class Memoize(Middleware):
+  """LRU cache of results keyed by ``key(call)``; calls whose key is None are not cached.
+
+  Failures are never cached. Use it only for calls without side effects, e.g. scoped to one
+  tool with ``ToolRegistry.use(Memoize(...), tools=[...])``.
+  """
+
+  def __init__(self, maxsize: int = 256, ttl: Optional[float] = None,
+               key: Callable[[ToolCall], Optional[Hashable]] = argument_key) -> None:
+    self.maxsize = maxsize
+    self.ttl = ttl
+    self.key = key
+    self.hits = 0
+    self.misses = 0
+    self._lock = threading.Lock()
+    self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+
+  def _get(self, key: Hashable) -> Tuple[bool, Any]:
+    with self._lock:
+      entry = self._entries.get(key)
+      if entry is not None and (self.ttl is None or time.monotonic() - entry[0] < self.ttl):
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[1]
+      self.misses += 1
+      return False, None
+
+  def _put(self, key: Hashable, value: Any) -> None:
+    with self._lock:
+      self._entries[key] = (time.monotonic(), value)
+      self._entries.move_to_end(key)
+      while len(self._entries) > self.maxsize:
+        self._entries.popitem(last=False)
+
+  def handle(self, call: ToolCall, proceed: Handler) -> Any:
+    key = self.key(call)
+    if key is None:
+      return proceed(call)
+    found, value = self._get(key)
+    if found:
+      return value
+    value = proceed(call)
+    self._put(key, value)
+    return value
+
+  async def ahandle(self, call: ToolCall, proceed: AsyncHandler) -> Any:
+    key = self.key(call)
+    if key is None:
+      return await proceed(call)
+    found, value = self._get(key)
+    if found:
+      return value
+    value = await proceed(call)
+    self._put(key, value)
+    return value
+
+
+class ConcurrencyLimit(Middleware):
+  """At most ``limit`` calls in flight at once across every registry sharing this instance."""
+
+  # Async waiters poll instead of parking a thread, so cancelling them cannot leak a slot.
+  POLL_SECONDS = 0.01
+
+  def __init__(self, limit: int) -> None:
+    if limit < 1:
+      raise ValueError("limit must be at least 1")
+    self.limit = limit
+    self._semaphore = threading.BoundedSemaphore(limit)
+
+  def handle(self, call: ToolCall, proceed: Handler) -> Any:
+    with self._semaphore:
+      return proceed(call)
+
+  async def ahandle(self, call: ToolCall, proceed: AsyncHandler) -> Any:
+    while not self._semaphore.acquire(blocking=False):
+      await asyncio.sleep(self.POLL_SECONDS)
+    try:
+      return await proceed(call)
+    finally:
+      self._semaphore.release()
+
+
+def default_middleware() -> List[Middleware]:
+  return [TranslateErrors(), Timing()]
+
+
+def _run_sync(call: ToolCall) -> Any:
+  return call.tool.run(*call.args, **call.kwargs)
+
+
+def _run_coroutine(call: ToolCall) -> Any:
+  # An async tool called from synchronous agent code (a worker thread without a running loop).
+  return asyncio.run(call.tool.run(*call.args, **call.kwargs))
+
+
+async def _await_coroutine(call: ToolCall) -> Any:
+  return await call.tool.run(*call.args, **call.kwargs)
+
+
+async def _run_in_thread(call: ToolCall) -> Any:
+  return await asyncio.to_thread(call.tool.run, *call.args, **call.kwargs)
+
+
+class ToolRegistry:
+  """Tools indexed by name, each with a precompiled middleware chain.
+
+  Middleware is applied outermost first in the order it was added; ``use`` appends innermost
+  (closest to the tool). Tools whose ``run`` is a coroutine function are awaited by
+  ``ainvoke`` and run to completion by ``invoke``; synchronous tools run in a worker thread
+  under ``ainvoke``.
+  """
+
+  def __init__(self, tools: Iterable[Any] = (), middleware: Optional[Iterable[Middleware]] = None) -> None:
+    self._tools: Dict[str, Any] = {}
+    self._middleware: List[Tuple[Middleware, Optional[frozenset]]] = [
+        (item, None) for item in (default_middleware() if middleware is None else middleware)]
+    self._chains: Dict[str, Tuple[Handler, AsyncHandler]] = {}
+    for tool in tools:
+      self.register(tool)
+
+  def __contains__(self, name: str) -> bool:
+    return name in self._tools
+
+  def __iter__(self) -> Iterator[Any]:
+    return iter(self._tools.values())
+
+  def __len__(self) -> int:
+    return len(self._tools)
+
+  def get(self, name: str) -> Optional[Any]:
+    return self._tools.get(name)
+
+  def register(self, tool: Any) -> None:
+    if tool.name in self._tools:
+      raise ValueError(f"Tool {tool.name} is already registered")
+    self._tools[tool.name] = tool
+    self._compile(tool.name)
+
+  def use(self, middleware: Middleware, tools: Optional[Iterable[str]] = None) -> None:
+    """Add ``middleware`` for every tool, or only for the ``tools`` named."""
+    self._middleware.append((middleware, frozenset(tools) if tools is not None else None))
+    for name in self._tools:
+      self._compile(name)
+
+  def _compile(self, name: str) -> None:
+    is_async = inspect.iscoroutinefunction(self._tools[name].run)
+    handler: Handler = _run_coroutine if is_async else _run_sync
+    ahandler: AsyncHandler = _await_coroutine if is_async else _run_in_thread
+    for middleware, scope in reversed(self._middleware):
+      if scope is None or name in scope:
+        handler = functools.partial(middleware.handle, proceed=handler)
+        ahandler = functools.partial(middleware.ahandle, proceed=ahandler)
+    self._chains[name] = (handler, ahandler)
+
+  def _call(self, agent: str, name: str, args: Tuple[Any, ...], kwargs: Dict[str, Any]) -> Tuple[ToolCall, Tuple]:
+    chain = self._chains.get(name)
+    if chain is None:
+      raise ValueError(f"Tool {name} not registered for {agent}")
+    return ToolCall(agent, name, self._tools[name], args, kwargs), chain
+
+  def invoke(self, agent: str, name: str, *args: Any, **kwargs: Any) -> Any:
+    call, chain = self._call(agent, name, args, kwargs)
+    return chain[0](call)
+
+  async def ainvoke(self, agent: str, name: str, *args: Any, **kwargs: Any) -> Any:
+    call, chain = self._call(agent, name, args, kwargs)
+    return await chain[1](call)
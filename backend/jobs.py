@@ -0,0 +1,207 @@
+"""Background job queue that runs orchestrator pipelines outside the request thread."""
+
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from tools.resilience import Cancelled
+
+if TYPE_CHECKING:
+    from orchestrator.orchestrator import MultiAgentOrchestrator
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+def _now() -> str:
+    return datetime.now().isoformat(timespec="seconds")
+
+
+@dataclass
+class Job:
+    job_id: str
+    requirement: str
+    # Seconds the whole run may take (None: no limit); tasks past it fail.
+    timeout: Optional[float] = None
+    status: str = QUEUED
+    created_at: str = field(default_factory=_now)
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    # Number of extra triggers merged into this job while it was still queued.
+    coalesced: int = 0
+    tasks: List[Dict[str, Any]] = field(default_factory=list)
+    error: Optional[str] = None
+    cancel_reason: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "requirement": self.requirement,
+            "timeout": self.timeout,
+            "status": self.status,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "coalesced": self.coalesced,
+            "tasks": self.tasks,
+            "error": self.error,
+        }
+
+
+class JobQueue:
+    """Runs each job on a fresh orchestrator from ``factory``.
+
+    A trigger whose requirement matches a job that is still queued joins that job instead of
+    adding another run; with ``supersede`` it also cancels running jobs for that requirement so
+    the new one takes over. Jobs for the same requirement run one at a time, since they would
+    resume the same journal run and write the same files: a later one stays queued, without taking
+    a worker, and is handed to the pool when the earlier one finishes. Only the newest ``history``
+    finished jobs are kept for status lookups. ``on_finish`` is called with every job that ran,
+    on its worker thread.
+    """
+
+    def __init__(self, factory: Callable[[], MultiAgentOrchestrator], max_workers: int = 1,
+                 history: int = 100, on_finish: Optional[Callable[[Job], None]] = None) -> None:
+        self.factory = factory
+        self.history = history
+        self.on_finish = on_finish
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queued: Dict[str, Job] = {}
+        # Orchestrators of running jobs, so they can be cancelled.
+        self._running: Dict[str, MultiAgentOrchestrator] = {}
+        # Requirement -> ID of the one job for it that has been handed to the pool and not finished.
+        self._active: Dict[str, str] = {}
+
+    def submit(self, requirement: str, timeout: Optional[float] = None,
+               supersede: bool = False) -> Tuple[Job, bool]:
+        """Enqueue a run; returns (job, created) where created is False for a coalesced trigger."""
+        with self._lock:
+            job = self._queued.get(requirement)
+            created = job is None
+            if created:
+                job = Job(job_id=uuid.uuid4().hex, requirement=requirement, timeout=timeout)
+                self._jobs[job.job_id] = job
+                self._queued[requirement] = job
+                self._prune()
+                start = requirement not in self._active
+                if start:
+                    self._active[requirement] = job.job_id
+            else:
+                job.coalesced += 1
+            superseded = [running.job_id for running in self._jobs.values()
+                          if running.status == RUNNING and running.requirement == requirement] if supersede else []
+        for job_id in superseded:
+            self.cancel(job_id, f"superseded by job {job.job_id}")
+        if not created:
+            logger.info(f"Job {job.job_id} already queued for '{requirement}'; coalescing")
+            return job, False
+        if start:
+            self._executor.submit(self._run, job)
+            logger.info(f"Job {job.job_id} queued for '{requirement}'")
+        else:
+            logger.info(f"Job {job.job_id} queued for '{requirement}'; starts when the current one finishes")
+        return job, True
+
+    def cancel(self, job_id: str, reason: str = "cancelled") -> Optional[Job]:
+        """Cancel a queued or running job; a running one stops at its tasks' next cancellation point."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINISHED or job.cancel_reason is not None:
+                return job
+            job.cancel_reason = reason
+            orchestrator = self._running.get(job_id)
+            if job.status == QUEUED:
+                if self._queued.get(job.requirement) is job:
+                    del self._queued[job.requirement]
+                job.status, job.error, job.finished_at = CANCELLED, reason, _now()
+        logger.warning(f"Cancelling job {job_id}: {reason}")
+        if orchestrator is not None:
+            orchestrator.cancel(reason)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job: Job) -> None:
+        try:
+            self._run_job(job)
+        finally:
+            self._release(job.requirement)
+
+    def _release(self, requirement: str) -> None:
+        """Hand the job held back for ``requirement``, if any, to the pool."""
+        with self._lock:
+            del self._active[requirement]
+            held = self._queued.get(requirement)
+            if held is not None:
+                self._active[requirement] = held.job_id
+        if held is None:
+            return
+        try:
+            self._executor.submit(self._run, held)
+        except RuntimeError:
+            # The pool was shut down while the previous job was still running.
+            self.cancel(held.job_id, "job queue shut down")
+            with self._lock:
+                self._active.pop(requirement, None)
+
+    def _run_job(self, job: Job) -> None:
+        with self._lock:
+            if job.status == CANCELLED:
+                return
+            # From here on new triggers start a new job: this one may already be past its inputs.
+            self._queued.pop(job.requirement, None)
+            job.status, job.started_at = RUNNING, _now()
+        # Every record logged while the job runs, including by its tasks, carries the job ID.
+        with logger.contextualize(job_id=job.job_id):
+            orchestrator = None
+            try:
+                # The factory may build agents and tools lazily, so it can fail too (e.g. missing API key).
+                orchestrator = self.factory()
+                with self._lock:
+                    self._running[job.job_id] = orchestrator
+                    reason = job.cancel_reason
+                if reason is not None:
+                    orchestrator.cancel(reason)
+                orchestrator.bootstrap(job.requirement)
+                orchestrator.run(concurrent=True, timeout=job.timeout)
+                status, error = SUCCEEDED, None
+            except Cancelled as e:
+                logger.warning(f"Job {job.job_id} cancelled: {e}")
+                status, error = CANCELLED, str(e)
+            except Exception as e:
+                logger.error(f"❌ Job {job.job_id} failed: {e}")
+                status, error = FAILED, str(e)
+            with self._lock:
+                self._running.pop(job.job_id, None)
+                job.status, job.error, job.finished_at = status, error, _now()
+                job.tasks = orchestrator.summary() if orchestrator is not None else []
+            logger.info(f"Job {job.job_id} {status}")
+            if self.on_finish is not None:
+                try:
+                    self.on_finish(job)
+                except Exception as e:
+                    logger.error(f"on_finish hook failed for job {job.job_id}: {e}")
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.status in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self._jobs[job_id]
@@ -0,0 +1,123 @@
+"""Loguru sinks for the backend: queued file and console writers, optional JSON lines and DEBUG rate limits."""
+
+from __future__ import annotations
+
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, TextIO, Tuple
+
+from loguru import logger
+
+from tools.metrics import LOG_RECORDS_DROPPED
+
+# Bound per job / task with logger.contextualize(job_id=..., task_id=...); "-" outside of one.
+CORRELATION_DEFAULTS = {"job_id": "-", "task_id": "-"}
+FILE_FORMAT = ("{time:YYYY-MM-DD HH:mm:ss} | {level} | job={extra[job_id]} task={extra[task_id]} | "
+               "{name}:{function}:{line} - {message}")
+CONSOLE_FORMAT = ("<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | "
+                  "<magenta>job={extra[job_id]} task={extra[task_id]}</magenta> | "
+                  "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>")
+DEBUG_LEVEL_NO = 10
+
+
+class DebugRateLimiter:
+    """Loguru filter letting at most ``rate`` DEBUG records per second through from each call site.
+
+    A token bucket per (module, function, line) allows bursts of ``burst`` records; INFO and above
+    always pass. Dropped records are counted in ``log_records_dropped_total``. The decision is made
+    once per record and reused by every sink sharing this filter.
+    """
+
+    def __init__(self, rate: float, burst: float | None = None) -> None:
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate)
+        self._lock = threading.Lock()
+        # call site -> [tokens, last refill]
+        self._buckets: Dict[Tuple[str, str, int], List[float]] = {}
+        self._local = threading.local()
+
+    def __call__(self, record: Dict[str, Any]) -> bool:
+        if self.rate <= 0 or record["level"].no > DEBUG_LEVEL_NO:
+            return True
+        last = getattr(self._local, "last", None)
+        if last is not None and last[0] is record:
+            return last[1]
+        allowed = self._take((record["name"], record["function"], record["line"]))
+        if not allowed:
+            LOG_RECORDS_DROPPED.inc(module=record["name"] or "")
+        self._local.last = (record, allowed)
+        return allowed
+
+    def _take(self, site: Tuple[str, str, int]) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                bucket = self._buckets[site] = [self.burst, now]
+            bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+            if bucket[0] < 1:
+                return False
+            bucket[0] -= 1
+            return True
+
+
+class QueuedStream:
+    """Stream sink that hands formatted messages to a writer thread.
+
+    The logging thread only puts the text on an in-process queue, so a slow terminal or a full
+    stdout pipe no longer stalls the pipeline. The stream is flushed whenever the queue runs
+    empty, and ``stop`` (called by loguru when the handler is removed, including at exit) drains
+    the queue.
+    """
+
+    def __init__(self, stream: TextIO) -> None:
+        self.stream = stream
+        self._queue: "queue.SimpleQueue[Optional[str]]" = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def write(self, message: str) -> None:
+        self._queue.put(message)
+
+    def _drain(self) -> None:
+        while True:
+            message = self._queue.get()
+            if message is None:
+                return
+            try:
+                self.stream.write(message)
+                if self._queue.empty():
+                    self.stream.flush()
+            except (OSError, ValueError):
+                # Closed or broken stream: drop the line rather than kill the writer.
+                pass
+
+    def stop(self) -> None:
+        self._queue.put(None)
+        self._thread.join()
+
+
+def configure_logging(log_file: Path, level: str = "DEBUG", json_logs: bool = False, queued: bool = True,
+                      debug_rate: float = 0.0) -> None:
+    """Replace the default sink with a rotating file sink and a console sink.
+
+    With ``queued`` neither sink writes on the logging thread: the file sink uses loguru's
+    ``enqueue`` (a writer thread that also handles rotation; ``logger.complete()`` waits for it)
+    and the console is written by a QueuedStream. Without it both write synchronously, the file
+    line-buffered. ``json_logs`` writes one JSON object per line (loguru ``serialize``) instead of
+    the text formats, with the correlation IDs under ``record.extra``.
+    """
+    logger.remove()
+    logger.configure(extra=dict(CORRELATION_DEFAULTS))
+    common = {"level": level, "filter": DebugRateLimiter(debug_rate)}
+    logger.add(log_file, rotation="10 MB", retention="7 days", encoding="utf-8", format=FILE_FORMAT,
+               serialize=json_logs, enqueue=queued, **common)
+    console = QueuedStream(sys.stdout) if queued else sys.stdout
+    if json_logs:
+        logger.add(console, serialize=True, **common)
+    else:
+        logger.add(console, format=CONSOLE_FORMAT, colorize=True, **common)
@@ -1,74 +1,194 @@
+import os
+import threading
+import time
 from pathlib import Path
 from datetime import datetime
 from contextlib import asynccontextmanager
+from typing import Optional
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from loguru import logger
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.cron import CronTrigger
 
-from agents.code_evaluation_agent import CodeEvaluationAgent
-from agents.code_generation_agent import CodeGenerationAgent
-from agents.planning_agent import PlanningAgent
-from orchestrator.orchestrator import MultiAgentOrchestrator
-from tools.command_executor import CommandExecutor
-from tools.file_manager import FileManager
-from tools.llm_client import LLMClient
+from backend.encoding import dumps, negotiate
+from backend.jobs import JobQueue
+from backend.logging_setup import configure_logging
+from backend.paper_store import InvalidCursor, PaperStore, etag_matches, make_etag
+from backend.search_index import SearchIndex
+from tools.metrics import REGISTRY
+from tools.paper_repository import PaperRepository
+from tools.resilience import breaker_snapshots
 
 # 配置日志文件
 BASE_DIR = Path(__file__).resolve().parents[1]
 LOGS_DIR = BASE_DIR / "logs"
 LOGS_DIR.mkdir(exist_ok=True)
 LOG_FILE = LOGS_DIR / f"agent_{datetime.now().strftime('%Y%m%d')}.log"
+# 运行状态目录：任务日志（journal）等持久化数据
+STATE_DIR = BASE_DIR / "state"
 
-# 移除默认handler，添加文件和控制台输出
-logger.remove()
-logger.add(
+# 移除默认handler，添加文件和控制台输出（默认都由后台线程写入，不阻塞流水线和请求）
+configure_logging(
     LOG_FILE,
-    rotation="10 MB",
-    retention="7 days",
-    level="DEBUG",
-    format="{time:YYYY-MM-DD HH:mm:ss} | {level} | {name}:{function}:{line} - {message}",
-    encoding="utf-8",
+    level=os.getenv("LOG_LEVEL", "DEBUG"),
+    json_logs=os.getenv("LOG_FORMAT", "text").lower() == "json",
+    queued=os.getenv("LOG_QUEUED", "1") != "0",
+    # 每个调用位置每秒最多输出的 DEBUG 日志条数（0 表示不限）
+    debug_rate=float(os.getenv("LOG_DEBUG_RATE", "20")),
 )
-logger.add(
-    lambda msg: print(msg, end=""),
-    level="DEBUG",
-    format="<green>{time:YYYY-MM-DD HH:mm:ss}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
-    colorize=True,
-)
-
-# 初始化工具和智能体
-file_manager = FileManager()
-command_executor = CommandExecutor()
-llm_client = LLMClient()
-planner = PlanningAgent(name="planner")
-coder = CodeGenerationAgent(name="coder", tools=[file_manager, command_executor, llm_client])
-evaluator = CodeEvaluationAgent(name="evaluator", tools=[command_executor])
-orchestrator = MultiAgentOrchestrator(planner, coder, evaluator)
 
 PAPERS_FILE = BASE_DIR / "frontend" / "src" / "data" / "papers.json"
+# 按日期/分类切分的静态分片及 manifest，由 Vite 原样发布到 /data
+SHARDS_DIR = BASE_DIR / "frontend" / "public" / "data"
+PAPERS_DB = STATE_DIR / "papers.db"
 
-# 全局调度器
-scheduler = BackgroundScheduler()
+# 论文归档：/papers 等只读接口只需要它
+paper_repository = PaperRepository(PAPERS_DB)
+_seed_lock = threading.Lock()
 
 
-def daily_update_job():
-    """每日更新任务：使用多智能体系统更新论文数据"""
-    logger.info("🔄 Starting daily update job...")
+def seed_archive() -> None:
+    """首次启用数据库：从现有的 papers.json 导入（模拟论文除外）
+
+    在应用启动时和构建流水线组件时调用（导入 backend.main 本身不写数据库）
+    """
+    with _seed_lock:
+        if paper_repository.data_version() == 0 and PAPERS_FILE.exists():
+            logger.info(f"Seeding paper archive from {PAPERS_FILE}: {paper_repository.import_json(PAPERS_FILE)}")
+
+
+# 智能体和工具在第一次使用时才构建（模块级 __getattr__），只提供读接口的进程
+# 不会导入 openai 等较重的依赖，也不需要 OPENAI_API_KEY
+LAZY_COMPONENTS = ("file_manager", "command_executor", "paper_shards", "llm_client",
+                   "planner", "coder", "evaluator", "run_journal", "task_fingerprints", "orchestrator")
+_components = {}
+_components_lock = threading.Lock()
+
+
+def _build_components() -> dict:
+    """初始化工具和智能体"""
+    from agents.code_evaluation_agent import CodeEvaluationAgent
+    from agents.code_generation_agent import CodeGenerationAgent
+    from agents.planning_agent import PlanningAgent
+    from agents.tool_registry import ConcurrencyLimit
+    from orchestrator.fingerprints import TaskFingerprints
+    from orchestrator.journal import RunJournal
+    from orchestrator.orchestrator import MultiAgentOrchestrator
+    from tools.command_executor import CommandExecutor
+    from tools.file_manager import FileManager
+    from tools.llm_cache import LLMCache
+    from tools.llm_client import LLMClient
+    from tools.paper_shards import PaperShardPublisher
+
+    # 流水线会把归档导出为 papers.json，先确保已有数据已导入
+    seed_archive()
+    file_manager = FileManager()
+    command_executor = CommandExecutor()
+    paper_shards = PaperShardPublisher(SHARDS_DIR, file_manager)
+    llm_client = LLMClient(cache=LLMCache(STATE_DIR / "llm_cache"))
+    planner = PlanningAgent(name="planner", papers_per_run=int(os.getenv("PAPERS_PER_RUN", "15")),
+                            shard_size=int(os.getenv("PAPERS_PER_SHARD", "25")),
+                            retain_days=int(os.getenv("PAPERS_RETENTION_DAYS", "0")) or None)
+    coder = CodeGenerationAgent(name="coder", tools=[file_manager, command_executor, llm_client, paper_repository, paper_shards])
+    evaluator = CodeEvaluationAgent(name="evaluator", tools=[command_executor])
+    # 所有智能体共享的命令并发上限（npm 构建等较重的子进程），通过工具中间件实现
+    command_limit = ConcurrencyLimit(int(os.getenv("COMMAND_CONCURRENCY", "2")))
+    for agent in (coder, evaluator):
+        agent.registry.use(command_limit, tools=["command_executor"])
+    run_journal = RunJournal(STATE_DIR / "run_journal.jsonl")
+    # 任务输入/输出指纹：输入未变且输出完好的任务直接复用上次结果
+    task_fingerprints = TaskFingerprints(STATE_DIR / "task_fingerprints.json")
+    return {
+        "file_manager": file_manager,
+        "command_executor": command_executor,
+        "paper_shards": paper_shards,
+        "llm_client": llm_client,
+        "planner": planner,
+        "coder": coder,
+        "evaluator": evaluator,
+        "run_journal": run_journal,
+        "task_fingerprints": task_fingerprints,
+        # 供命令行直接调用（见 README）；API 和定时任务通过 job_queue 运行
+        "orchestrator": MultiAgentOrchestrator(planner, coder, evaluator, journal=run_journal,
+                                               fingerprints=task_fingerprints),
+    }
+
+
+def _component(name: str):
+    if not _components:
+        with _components_lock:
+            if not _components:
+                started = time.perf_counter()
+                _components.update(_build_components())
+                logger.info(f"Agents and tools initialized in {time.perf_counter() - started:.3f}s")
+    return _components[name]
+
+
+def __getattr__(name: str):
+    """惰性模块属性：`from backend.main import orchestrator` 等在第一次访问时才构建"""
+    if name in LAZY_COMPONENTS:
+        return _component(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def build_orchestrator():
+    """每个任务使用独立的编排器实例（智能体和工具共享）"""
+    from orchestrator.orchestrator import MultiAgentOrchestrator
+
+    return MultiAgentOrchestrator(_component("planner"), _component("coder"), _component("evaluator"),
+                                  journal=_component("run_journal"), fingerprints=_component("task_fingerprints"))
+
+
+# 进程级论文缓存：仅在数据库版本变化时重新加载
+paper_store = PaperStore(PAPERS_FILE, repository=paper_repository)
+# 全文检索索引：数据版本变化时增量同步并发布新快照，/search 只读已发布的快照
+search_index = SearchIndex()
+
+
+def _sync_search_index(snapshot) -> None:
+    upserted, removed = search_index.sync(snapshot.papers, snapshot.version)
+    logger.info(f"Search index synced to v{snapshot.version}: {upserted} upserted, {removed} removed")
+
+
+paper_store.subscribe(_sync_search_index)
+
+
+def refresh_paper_data(job=None) -> None:
+    """重新加载论文缓存（数据有变化时顺带同步检索索引）；在写数据的任务结束后和启动时调用"""
     try:
-        orchestrator.bootstrap("daily refresh")
-        orchestrator.run()
-        logger.info("✅ Daily update completed successfully")
-    except Exception as e:
-        logger.error(f"❌ Daily update failed: {e}")
+        paper_store.snapshot()
+    except FileNotFoundError:
+        pass
+
+
+# 后台任务队列：/run、/update 和每日定时任务都在这里排队执行
+job_queue = JobQueue(build_orchestrator, max_workers=int(os.getenv("JOB_WORKERS", "1")),
+                     on_finish=refresh_paper_data)
+# 每日刷新必须在这个时间窗口（秒）内完成，超时的任务标记为失败，后续任务跳过
+DAILY_REFRESH_WINDOW = float(os.getenv("DAILY_REFRESH_WINDOW", "1800"))
+
+# 全局调度器（在 lifespan 中创建，导入 backend.main 时不加载 apscheduler）
+scheduler = None
+
+
+def daily_update_job():
+    """每日更新任务：放入后台队列（与手动触发的刷新合并）"""
+    job, created = job_queue.submit("daily refresh", timeout=DAILY_REFRESH_WINDOW)
+    logger.info(f"🔄 Daily update job {'queued' if created else 'merged into'} {job.job_id}")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理：启动和关闭调度器"""
+    global scheduler
+    from apscheduler.schedulers.background import BackgroundScheduler
+    from apscheduler.triggers.cron import CronTrigger
+
+    seed_archive()
+    refresh_paper_data()
     # 启动时：设置每日更新任务（每天凌晨2点执行）
+    scheduler = BackgroundScheduler()
     scheduler.add_job(
         daily_update_job,
         trigger=CronTrigger(hour=2, minute=0),  # 每天凌晨2点
@@ -79,9 +199,12 @@ async def lifespan(app: FastAPI):
     scheduler.start()
     logger.info("📅 Daily update scheduler started (runs daily at 02:00)")
     yield
-    # 关闭时：停止调度器
+    # 关闭时：停止调度器和任务队列（正在运行的任务不等待）
     scheduler.shutdown()
+    job_queue.shutdown()
     logger.info("📅 Daily update scheduler stopped")
+    # 等待日志写入线程把排队的记录写完
+    await logger.complete()
 
 
 app = FastAPI(title="arXiv CS Daily Agent", lifespan=lifespan)
@@ -94,46 +217,191 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+HTTP_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Duration of HTTP requests by route.", ("method", "route", "status"))
+
+
+@app.middleware("http")
+async def record_request_duration(request: Request, call_next):
+    """记录每个路由的请求耗时（使用路由模板，避免 /jobs/{id} 之类的路径产生大量标签）"""
+    with HTTP_DURATION.time(method=request.method, route="unmatched", status="500") as labels:
+        response = await call_next(request)
+        route = request.scope.get("route")
+        labels["route"] = getattr(route, "path", "unmatched")
+        labels["status"] = str(response.status_code)
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus 文本格式的指标"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+def _accepted(job, created: bool) -> Response:
+    body = {**job.to_dict(), "coalesced_into_existing": not created, "status_url": f"/jobs/{job.job_id}"}
+    return Response(content=dumps(body), status_code=202, media_type="application/json",
+                    headers={"Location": f"/jobs/{job.job_id}"})
+
 
-@app.post("/run")
-def run_project(requirement: str):
-    """手动触发多智能体任务"""
-    orchestrator.bootstrap(requirement)
-    orchestrator.run()
-    return {"tasks": orchestrator.summary()}
+@app.post("/run", status_code=202)
+def run_project(requirement: str, timeout: Optional[float] = Query(None, gt=0)):
+    """手动触发多智能体任务（后台执行，立即返回任务 ID；timeout 为整个运行的时间上限，单位秒）"""
+    return _accepted(*job_queue.submit(requirement, timeout=timeout))
 
 
-@app.post("/update")
-def trigger_daily_update():
-    """手动触发每日更新（不等待定时任务）"""
+@app.post("/update", status_code=202)
+def trigger_daily_update(cancel_running: bool = False):
+    """手动触发每日更新（不等待定时任务；排队中的相同刷新会被合并）
+
+    cancel_running=true 时取消正在运行的刷新，由新的刷新接替
+    """
     logger.info("🔄 Manual daily update triggered")
-    try:
-        orchestrator.bootstrap("daily refresh")
-        orchestrator.run()
-        return {
-            "status": "success",
-            "message": "Daily update completed",
-            "tasks": orchestrator.summary()
-        }
-    except Exception as e:
-        logger.error(f"❌ Manual update failed: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+    return _accepted(*job_queue.submit("daily refresh", timeout=DAILY_REFRESH_WINDOW, supersede=cancel_running))
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """查询后台任务状态"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
+
+@app.post("/jobs/{job_id}/cancel")
+def cancel_job(job_id: str):
+    """取消排队中或正在运行的任务（运行中的任务在下一个取消检查点停止）"""
+    job = job_queue.cancel(job_id, "cancelled via API")
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job {job_id}")
+    return job.to_dict()
+
+
+DATE_PARAM = r"^\d{4}-\d{2}-\d{2}$"
 
 
 @app.get("/papers")
-def list_papers():
-    """获取论文列表"""
-    if not PAPERS_FILE.exists():
+def list_papers(
+    request: Request,
+    category: Optional[str] = None,
+    date: Optional[str] = Query(None, pattern=DATE_PARAM),
+    date_from: Optional[str] = Query(None, pattern=DATE_PARAM),
+    date_to: Optional[str] = Query(None, pattern=DATE_PARAM),
+    limit: Optional[int] = Query(None, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    since_version: Optional[int] = Query(None, ge=0),
+):
+    """获取论文列表（支持 ETag / If-None-Match 条件请求，以及按分类/日期过滤和游标分页）"""
+    if since_version is not None:
+        return _papers_since(request, since_version, category, date, date_from, date_to, limit, cursor)
+    try:
+        snapshot = paper_store.snapshot()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="papers.json not generated yet")
+    filtered = any(value is not None for value in (category, date, date_from, date_to, limit, cursor))
+    # 完整列表使用预先压缩好的版本（按 Accept-Encoding 选择）
+    encoding = None if filtered else negotiate(request.headers.get("accept-encoding"), snapshot.variants)
+    headers = {
+        "ETag": snapshot.etag_for(encoding),
+        "Last-Modified": snapshot.last_modified,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+        "X-Data-Version": str(snapshot.data_version),
+    }
+    if filtered:
+        # 过滤结果的 ETag 由数据版本和查询参数共同决定
+        headers["ETag"] = snapshot.query_etag(str(request.url.query))
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if not filtered:
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+            return Response(content=snapshot.variants[encoding], media_type="application/json", headers=headers)
+        return Response(content=snapshot.body, media_type="application/json", headers=headers)
+    try:
+        page, next_cursor, total = snapshot.index.query(
+            category=category,
+            date_from=date or date_from,
+            date_to=date or date_to,
+            limit=limit,
+            cursor=cursor,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    body = dumps({"papers": page, "next_cursor": next_cursor, "total": total})
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@app.get("/papers/{paper_id}")
+def get_paper(request: Request, paper_id: str):
+    """获取单篇论文（详情页使用，无需下载完整列表）"""
+    try:
+        snapshot = paper_store.snapshot()
+    except FileNotFoundError:
         raise HTTPException(status_code=404, detail="papers.json not generated yet")
-    import json
-    data = json.loads(PAPERS_FILE.read_text(encoding="utf-8"))
-    return {"papers": data}
+    paper = snapshot.index.by_id.get(paper_id)
+    if paper is None:
+        raise HTTPException(status_code=404, detail=f"Unknown paper {paper_id}")
+    headers = {"ETag": snapshot.query_etag(f"id={paper_id}"), "Cache-Control": "no-cache",
+               "X-Data-Version": str(snapshot.data_version)}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=dumps(paper), media_type="application/json", headers=headers)
+
+
+def _papers_since(request: Request, since_version: int, *filters) -> Response:
+    """增量更新：返回 since_version 之后新增/变更的论文和已退役的论文 ID"""
+    if any(value is not None for value in filters):
+        raise HTTPException(status_code=400, detail="since_version cannot be combined with other filters")
+    current = paper_repository.data_version()
+    headers = {"ETag": make_etag(f"v{current}-since{since_version}", weak=True), "Cache-Control": "no-cache",
+               "X-Data-Version": str(current)}
+    if etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if since_version > current:
+        # 客户端的版本比服务器新（例如归档被重建）：需要重新拉取完整列表
+        body = {"version": current, "since_version": since_version, "reset": True, "papers": [], "retired": []}
+    else:
+        body = {**paper_repository.changes_since(since_version), "reset": False}
+    return Response(content=dumps(body), media_type="application/json", headers=headers)
+
+
+@app.get("/search")
+def search_papers(
+    q: str = Query(..., min_length=1, max_length=200),
+    category: Optional[str] = None,
+    date_from: Optional[str] = Query(None, pattern=DATE_PARAM),
+    date_to: Optional[str] = Query(None, pattern=DATE_PARAM),
+    limit: int = Query(20, ge=1, le=100),
+):
+    """全文检索：标题、摘要、作者（BM25 排序，最后一个词支持前缀匹配）"""
+    try:
+        # 通常只是探测数据版本；数据在任务之外被改写时，这里重新加载并同步索引
+        paper_store.snapshot()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="papers.json not generated yet")
+    hits, total = search_index.search(q, category=category, date_from=date_from, date_to=date_to, limit=limit)
+    body = dumps({
+        "query": q,
+        "total": total,
+        "results": [{**paper, "score": score} for score, paper in hits],
+    })
+    return Response(content=body, media_type="application/json")
+
+
+@app.get("/breakers")
+def get_breakers():
+    """熔断器状态（closed / open / half_open），例如 LLM 调用的 "llm"；在首次调用前为空"""
+    return {"breakers": breaker_snapshots()}
 
 
 @app.get("/scheduler/status")
 def get_scheduler_status():
     """获取调度器状态"""
     jobs = []
+    if scheduler is None:
+        return {"scheduler_running": False, "jobs": jobs}
     for job in scheduler.get_jobs():
         jobs.append({
             "id": job.id,
@@ -0,0 +1,210 @@
+"""Process-level cache of the paper data with pre-serialized response bytes."""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass, field
+from email.utils import formatdate
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.encoding import compress_all, dumps, loads
+from tools.paper_repository import PaperRepository
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(key: Tuple[str, str]) -> str:
+    raw = json.dumps(list(key), separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        date, paper_id = json.loads(raw)
+        return str(date), str(paper_id)
+    except (ValueError, TypeError) as exc:
+        raise InvalidCursor(f"Invalid cursor: {cursor}") from exc
+
+
+class PaperIndex:
+    """Papers sorted by (submittedAt, id) with per-category position lists and an id lookup.
+
+    Because the order is by date, any date range is a contiguous slice found by bisection, and a
+    category filter is a bisection into that category's sorted positions. Pages are served
+    newest first and a cursor is the (submittedAt, id) key of the last paper returned, so it
+    stays valid across data reloads.
+    """
+
+    def __init__(self, papers: List[Dict[str, Any]]) -> None:
+        self.papers = sorted(papers, key=self._key)
+        self.keys = [self._key(paper) for paper in self.papers]
+        self.dates = [key[0] for key in self.keys]
+        self.by_id = {str(paper.get("id", "")): paper for paper in self.papers}
+        positions: Dict[str, List[int]] = defaultdict(list)
+        for position, paper in enumerate(self.papers):
+            for category in paper.get("categories") or []:
+                positions[category].append(position)
+        self.by_category = dict(positions)
+
+    @staticmethod
+    def _key(paper: Dict[str, Any]) -> Tuple[str, str]:
+        return str(paper.get("submittedAt", "")), str(paper.get("id", ""))
+
+    def query(self, category: Optional[str] = None, date_from: Optional[str] = None,
+              date_to: Optional[str] = None, limit: Optional[int] = None,
+              cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str], int]:
+        """Return (page newest-first, next cursor or None, total matches)."""
+        low = bisect_left(self.dates, date_from) if date_from else 0
+        high = bisect_right(self.dates, date_to) if date_to else len(self.papers)
+        if category is not None:
+            candidates = self.by_category.get(category, [])
+            start, end = bisect_left(candidates, low), bisect_left(candidates, high)
+        else:
+            candidates, start, end = None, low, high
+        total = max(end - start, 0)
+        if cursor:
+            bound = bisect_left(self.keys, decode_cursor(cursor))
+            end = min(end, bisect_left(candidates, bound) if candidates is not None else bound)
+        count = end - start if limit is None else min(limit, end - start)
+        page_slots = range(end - 1, end - 1 - max(count, 0), -1)
+        page = [self.papers[candidates[slot] if candidates is not None else slot] for slot in page_slots]
+        next_cursor = None
+        if page and end - count > start:
+            next_cursor = encode_cursor(self._key(page[-1]))
+        return page, next_cursor, total
+
+
+@dataclass(frozen=True)
+class PaperSnapshot:
+    """One loaded version of the paper data plus everything needed to answer GET /papers."""
+
+    papers: List[Dict[str, Any]]
+    body: bytes
+    # Content hash of this version; every ETag served for it is built from it by make_etag.
+    digest: str
+    last_modified: str
+    version: int
+    index: PaperIndex
+    # PaperRepository.data_version this snapshot was read at (0 for a plain papers.json).
+    data_version: int = 0
+    # Compressed copies of ``body`` keyed by Content-Encoding, built once per version.
+    variants: Dict[str, bytes] = field(default_factory=dict)
+
+    def etag_for(self, encoding: Optional[str] = None) -> str:
+        """Strong ETag of the full list, per Content-Encoding."""
+        return make_etag(self.digest, encoding)
+
+    def query_etag(self, query: str) -> str:
+        """Weak ETag of a filtered response: this version plus a hash of the query."""
+        query_hash = hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]
+        return make_etag(f"{self.digest}-{query_hash}", weak=True)
+
+
+class PaperStore:
+    """Loads the paper data once and reloads only when its source changes.
+
+    The source is the SQLite archive when a repository is given (polled through its data
+    version counter), otherwise papers.json (polled through mtime/size, then content hash).
+    Listeners added with ``subscribe`` are called with each new snapshot on the thread that
+    loaded it, before any caller sees it.
+    """
+
+    def __init__(self, path: Path, repository: Optional[PaperRepository] = None) -> None:
+        self.path = Path(path)
+        self.repository = repository
+        self._lock = threading.Lock()
+        self._source_key: Optional[Tuple[int, int]] = None
+        self._digest: Optional[str] = None
+        self._snapshot: Optional[PaperSnapshot] = None
+        self._version = 0
+        self._listeners: List[Callable[[PaperSnapshot], None]] = []
+
+    def subscribe(self, listener: Callable[[PaperSnapshot], None]) -> None:
+        self._listeners.append(listener)
+
+    def snapshot(self) -> PaperSnapshot:
+        """Return the current snapshot; raises FileNotFoundError if there is no data yet."""
+        source_key, mtime = self._probe()
+        current = self._snapshot
+        if current is not None and source_key == self._source_key:
+            return current
+        with self._lock:
+            if self._snapshot is not None and source_key == self._source_key:
+                return self._snapshot
+            raw = self._read()
+            digest = hashlib.sha256(raw).hexdigest()
+            data_version = source_key[0] if self.repository is not None else 0
+            # Touched but identical content (e.g. a rewrite of the same data) keeps the old snapshot.
+            if self._snapshot is None or digest != self._digest:
+                snapshot = self._build(raw, digest, mtime, data_version)
+                for listener in self._listeners:
+                    listener(snapshot)
+                self._snapshot = snapshot
+                self._digest = digest
+            self._source_key = source_key
+            return self._snapshot
+
+    def _probe(self) -> Tuple[Tuple[int, int], float]:
+        if self.repository is not None:
+            version = self.repository.data_version()
+            if version == 0:
+                raise FileNotFoundError(f"No papers in {self.repository.path}")
+            return (version, 0), time.time()
+        stat = self.path.stat()
+        return (stat.st_mtime_ns, stat.st_size), stat.st_mtime
+
+    def _read(self) -> bytes:
+        if self.repository is not None:
+            return dumps(self.repository.all_papers())
+        return self.path.read_bytes()
+
+    def _build(self, raw: bytes, digest: str, mtime: float, data_version: int = 0) -> PaperSnapshot:
+        papers = loads(raw)
+        body = dumps({"papers": papers})
+        self._version += 1
+        return PaperSnapshot(
+            papers=papers,
+            body=body,
+            digest=digest[:32],
+            last_modified=formatdate(mtime, usegmt=True),
+            version=self._version,
+            index=PaperIndex(papers),
+            data_version=data_version,
+            variants=compress_all(body),
+        )
+
+
+def make_etag(tag: str, encoding: Optional[str] = None, weak: bool = False) -> str:
+    """Quote ``tag`` as an entity tag, with an optional content-coding suffix and weak marker."""
+    value = f'"{tag}-{encoding}"' if encoding else f'"{tag}"'
+    return f"W/{value}" if weak else value
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Evaluate an If-None-Match header (weak comparison, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(_opaque_tag(tag) == _opaque_tag(etag) for tag in if_none_match.split(","))
+
+
+def _opaque_tag(tag: str) -> str:
+    """Strip the weak marker and any content-coding suffix so all variants of a version match."""
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ("-gzip\"", "-br\""):
+        if tag.endswith(suffix):
+            return tag[:-len(suffix)] + '"'
+    return tag
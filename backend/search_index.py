@@ -0,0 +1,215 @@
+"""In-memory inverted index with BM25 ranking over paper titles, abstracts and authors."""
+
+from __future__ import annotations
+
+import hashlib
+import heapq
+import math
+import re
+import threading
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or our that the their this to we with".split()
+)
+# Matches in the title or author list count for more than matches in the abstract.
+FIELD_WEIGHTS = {"title": 3, "authors": 2, "abstract": 1}
+MAX_PREFIX_EXPANSIONS = 16
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+@dataclass(frozen=True)
+class SearchSnapshot:
+    """One published version of the index; never mutated, so it is searched without a lock."""
+
+    version: Optional[int]
+    k1: float
+    docs: Dict[str, Dict[str, Any]]
+    postings: Dict[str, Dict[str, float]]
+    # BM25 length normalisation per document.
+    norms: Dict[str, float]
+    # Sorted terms, for prefix expansion.
+    vocabulary: List[str]
+
+    def search(self, query: str, category: Optional[str] = None, date_from: Optional[str] = None,
+               date_to: Optional[str] = None, limit: int = 20, prefix: bool = True
+               ) -> Tuple[List[Tuple[float, Dict[str, Any]]], int]:
+        """Return the top ``limit`` (score, paper) pairs and the number of matching papers.
+
+        With ``prefix`` the last query token also matches any indexed term it starts, which
+        supports search-as-you-type.
+        """
+        tokens = tokenize(query)
+        count = len(self.docs)
+        if not tokens or not count:
+            return [], 0
+        terms: Dict[str, float] = Counter(tokens[:-1] if prefix else tokens)
+        if prefix:
+            for term in self._expand_prefix(tokens[-1]):
+                terms[term] = max(terms.get(term, 0.0), 1.0)
+        scores: Dict[str, float] = defaultdict(float)
+        for term, query_weight in terms.items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            weight = query_weight * idf * (self.k1 + 1)
+            for doc_id, frequency in postings.items():
+                scores[doc_id] += weight * frequency / (frequency + self.norms[doc_id])
+        matches = [(score, doc_id) for doc_id, score in scores.items()
+                   if self._accepts(self.docs[doc_id], category, date_from, date_to)]
+        top = heapq.nlargest(limit, matches)
+        return [(round(score, 4), self.docs[doc_id]) for score, doc_id in top], len(matches)
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        start = bisect_left(self.vocabulary, prefix)
+        expansions = []
+        for term in self.vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not term.startswith(prefix):
+                break
+            expansions.append(term)
+        return expansions
+
+    @staticmethod
+    def _accepts(paper: Dict[str, Any], category: Optional[str], date_from: Optional[str],
+                 date_to: Optional[str]) -> bool:
+        if category is not None and category not in (paper.get("categories") or []):
+            return False
+        submitted = str(paper.get("submittedAt", ""))
+        if date_from and submitted < date_from:
+            return False
+        if date_to and submitted > date_to:
+            return False
+        return True
+
+
+EMPTY_SNAPSHOT = SearchSnapshot(version=None, k1=1.2, docs={}, postings={}, norms={}, vocabulary=[])
+
+
+class SearchIndex:
+    """BM25 index that is synced incrementally from the loaded paper list.
+
+    ``sync`` updates the working index under a lock and then publishes an immutable
+    ``SearchSnapshot``; ``search`` only reads the published snapshot. Postings lists the sync
+    did not touch are shared with the previous snapshot rather than copied.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.Lock()
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        self._doc_terms: Dict[str, Dict[str, float]] = {}
+        self._doc_lengths: Dict[str, float] = {}
+        self._doc_hashes: Dict[str, str] = {}
+        self._docs: Dict[str, Dict[str, Any]] = {}
+        self._total_length = 0.0
+        # Terms whose postings changed since the last publish.
+        self._touched: Set[str] = set()
+        self._vocabulary_dirty = False
+        self._published = EMPTY_SNAPSHOT
+
+    @property
+    def version(self) -> Optional[int]:
+        return self._published.version
+
+    def sync(self, papers: List[Dict[str, Any]], version: Optional[int] = None) -> Tuple[int, int]:
+        """Apply only what changed since the last sync and publish; returns (upserted, removed) counts."""
+        with self._lock:
+            incoming = {str(paper.get("id")): paper for paper in papers if paper.get("id")}
+            removed = [doc_id for doc_id in self._docs if doc_id not in incoming]
+            for doc_id in removed:
+                self._remove(doc_id)
+            upserted = 0
+            for doc_id, paper in incoming.items():
+                digest = self._fingerprint(paper)
+                if self._doc_hashes.get(doc_id) == digest:
+                    self._docs[doc_id] = paper
+                    continue
+                if doc_id in self._docs:
+                    self._remove(doc_id)
+                self._add(doc_id, paper, digest)
+                upserted += 1
+            self._publish(version)
+            return upserted, len(removed)
+
+    def search(self, query: str, category: Optional[str] = None, date_from: Optional[str] = None,
+               date_to: Optional[str] = None, limit: int = 20, prefix: bool = True
+               ) -> Tuple[List[Tuple[float, Dict[str, Any]]], int]:
+        """Search the published snapshot (see ``SearchSnapshot.search``)."""
+        return self._published.search(query, category=category, date_from=date_from, date_to=date_to,
+                                       limit=limit, prefix=prefix)
+
+    def _publish(self, version: Optional[int]) -> None:
+        previous = self._published
+        postings = dict(previous.postings)
+        for term in self._touched:
+            if term in self._postings:
+                postings[term] = dict(self._postings[term])
+            else:
+                postings.pop(term, None)
+        self._touched.clear()
+        vocabulary = previous.vocabulary
+        if self._vocabulary_dirty:
+            vocabulary = sorted(postings)
+            self._vocabulary_dirty = False
+        norms: Dict[str, float] = {}
+        if self._docs:
+            average_length = self._total_length / len(self._docs)
+            norms = {
+                doc_id: self.k1 * (1 - self.b + self.b * length / average_length)
+                for doc_id, length in self._doc_lengths.items()
+            }
+        # A single reference assignment: readers see either the old snapshot or the new one.
+        self._published = SearchSnapshot(version=version, k1=self.k1, docs=dict(self._docs),
+                                         postings=postings, norms=norms, vocabulary=vocabulary)
+
+    @staticmethod
+    def _fields(paper: Dict[str, Any]) -> Dict[str, str]:
+        return {
+            "title": str(paper.get("title", "")),
+            "abstract": str(paper.get("abstract", "")),
+            "authors": " ".join(str(author) for author in paper.get("authors") or []),
+        }
+
+    def _fingerprint(self, paper: Dict[str, Any]) -> str:
+        fields = self._fields(paper)
+        return hashlib.sha1("\x1f".join(fields[name] for name in FIELD_WEIGHTS).encode("utf-8")).hexdigest()
+
+    def _add(self, doc_id: str, paper: Dict[str, Any], digest: str) -> None:
+        frequencies: Dict[str, float] = defaultdict(float)
+        for field, text in self._fields(paper).items():
+            for token in tokenize(text):
+                frequencies[token] += FIELD_WEIGHTS[field]
+        for term, frequency in frequencies.items():
+            if term not in self._postings:
+                self._vocabulary_dirty = True
+            self._postings[term][doc_id] = frequency
+            self._touched.add(term)
+        length = sum(frequencies.values())
+        self._doc_terms[doc_id] = dict(frequencies)
+        self._doc_lengths[doc_id] = length
+        self._doc_hashes[doc_id] = digest
+        self._docs[doc_id] = paper
+        self._total_length += length
+
+    def _remove(self, doc_id: str) -> None:
+        for term in self._doc_terms.pop(doc_id, {}):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(doc_id, None)
+            self._touched.add(term)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+        self._total_length -= self._doc_lengths.pop(doc_id, 0.0)
+        self._doc_hashes.pop(doc_id, None)
+        self._docs.pop(doc_id, None)
@@ -0,0 +1,35 @@
+// Bounded queries against the backend API (backend/main.py). Pages never request the unfiltered
+// /papers list: they ask for the date window they show, one cursor page at a time, or for one paper.
+const API_URL = 'http://127.0.0.1:8000'
+// Papers per page; the backend caps `limit` at 1000.
+const PAGE_SIZE = 200
+
+// Every paper submitted on or after `dateFrom` (optionally in one category), following the cursor.
+export async function fetchPapersSince(dateFrom, { category, signal } = {}) {
+  const papers = []
+  let cursor = null
+  do {
+    const params = new URLSearchParams({ date_from: dateFrom, limit: String(PAGE_SIZE) })
+    if (category) params.set('category', category)
+    if (cursor) params.set('cursor', cursor)
+    const res = await fetch(`${API_URL}/papers?${params}`, { signal })
+    if (!res.ok) throw new Error(`Backend responded with ${res.status}`)
+    const payload = await res.json()
+    papers.push(...(payload?.papers || []))
+    cursor = payload?.next_cursor
+  } while (cursor)
+  return papers
+}
+
+// A single paper, or null when the backend does not know it.
+export async function fetchPaper(paperId, signal) {
+  const res = await fetch(`${API_URL}/papers/${encodeURIComponent(paperId)}`, { signal })
+  if (res.status === 404) return null
+  if (!res.ok) throw new Error(`Backend responded with ${res.status}`)
+  return res.json()
+}
+
+// Window start used when the shard manifest is unavailable: `days` calendar days ago.
+export function daysAgo(days) {
+  return new Date(Date.now() - days * 24 * 60 * 60 * 1000).toISOString().slice(0, 10)
+}
@@ -0,0 +1,79 @@
+// Static paper shards published by the data pipeline under public/data (see tools/paper_shards.py).
+// Shard file names contain their content hash, so a shard fetched once is reused for the whole session.
+const DATA_URL = `${import.meta.env.BASE_URL}data`
+
+let manifestPromise = null
+const shardCache = new Map()
+
+export function loadManifest() {
+  if (!manifestPromise) {
+    // The manifest is the only file that changes in place, so always revalidate it.
+    manifestPromise = fetch(`${DATA_URL}/manifest.json`, { cache: 'no-cache' })
+      .then((res) => {
+        if (!res.ok) throw new Error(`Manifest responded with ${res.status}`)
+        return res.json()
+      })
+      .catch((err) => {
+        manifestPromise = null
+        throw err
+      })
+  }
+  return manifestPromise
+}
+
+function loadShard(entry) {
+  if (!shardCache.has(entry.hash)) {
+    const request = fetch(`${DATA_URL}/${entry.path}`)
+      .then((res) => {
+        if (!res.ok) throw new Error(`Shard ${entry.path} responded with ${res.status}`)
+        return res.json()
+      })
+      .catch((err) => {
+        shardCache.delete(entry.hash)
+        throw err
+      })
+    shardCache.set(entry.hash, request)
+  }
+  return shardCache.get(entry.hash)
+}
+
+async function loadShards(entries) {
+  const shards = await Promise.all(entries.map(loadShard))
+  return shards.flat()
+}
+
+// Papers from the newest `days` submission dates.
+export async function loadRecentPapers(days) {
+  const manifest = await loadManifest()
+  return loadShards(manifest.days.slice(0, days))
+}
+
+// Oldest of the newest `days` submission dates: the window the recent views (and their API queries) cover.
+export async function recentWindowStart(days) {
+  const manifest = await loadManifest()
+  const recent = manifest.days.slice(0, days)
+  return recent.length ? recent[recent.length - 1].date : null
+}
+
+// Category shards are split by month; only the months overlapping the recent window are fetched.
+export async function loadCategoryPapers(categoryId, days) {
+  if (!categoryId || categoryId === 'ALL') return loadRecentPapers(days)
+  const manifest = await loadManifest()
+  const entry = manifest.categories.find((item) => item.id === categoryId)
+  if (!entry) return []
+  const since = await recentWindowStart(days)
+  const months = since ? entry.months.filter((month) => month.month >= since.slice(0, 7)) : entry.months
+  const papers = await loadShards(months)
+  return since ? papers.filter((paper) => paper.submittedAt >= since) : papers
+}
+
+// Day shards are searched newest first, a few at a time, until the paper turns up.
+export async function findPaper(paperId, batchSize = 4) {
+  const manifest = await loadManifest()
+  for (let start = 0; start < manifest.days.length; start += batchSize) {
+    const papers = await loadShards(manifest.days.slice(start, start + batchSize))
+    const paper = papers.find((item) => item.id === paperId)
+    if (paper) return paper
+  }
+  return null
+}
@@ -1,7 +1,11 @@
 import { useEffect, useMemo, useState } from 'react'
 import { useParams, Link, useNavigate } from 'react-router-dom'
 import '../App.css'
-import fallbackPapers from '../data/papers.json'
+import { daysAgo, fetchPapersSince } from '../data/api'
+import { loadCategoryPapers, recentWindowStart } from '../data/shards'
+
+// "All Papers" 只加载最近几天的分片
+const RECENT_DAYS = 14
 
 const categories = [
   { id: 'ALL', title: 'All Papers', description: 'Browse every tracked submission.' },
@@ -21,7 +25,7 @@ const categoryMap = categories.reduce((acc, cat) => {
 export default function CategoryPage() {
   const { categoryId } = useParams()
   const navigate = useNavigate()
-  const [papers, setPapers] = useState(fallbackPapers)
+  const [papers, setPapers] = useState([])
   const [loading, setLoading] = useState(true)
   const [selectedDate, setSelectedDate] = useState(null)
 
@@ -29,22 +33,26 @@ export default function CategoryPage() {
 
   useEffect(() => {
     const fetchPapers = async () => {
-      setPapers(fallbackPapers)
+      // 先加载当前分类的静态分片；后端请求使用与分片相同的时间窗口
+      let dateFrom = daysAgo(RECENT_DAYS)
+      try {
+        setPapers(await loadCategoryPapers(categoryId, RECENT_DAYS))
+        dateFrom = (await recentWindowStart(RECENT_DAYS)) || dateFrom
+      } catch (err) {
+        console.log('Static paper shards not available')
+      }
       setLoading(false)
       
       // 尝试从后端获取最新数据
       const controller = new AbortController()
       const timeoutId = setTimeout(() => controller.abort(), 3000)
       try {
-        const res = await fetch('http://127.0.0.1:8000/papers', {
-          signal: controller.signal
-        })
+        // 只请求当前分类在时间窗口内的论文，由后端索引完成过滤并按游标分页
+        const category = categoryId && categoryId !== 'ALL' ? categoryId : undefined
+        const latest = await fetchPapersSince(dateFrom, { category, signal: controller.signal })
         clearTimeout(timeoutId)
-        if (res.ok) {
-          const payload = await res.json()
-          if (payload?.papers?.length) {
-            setPapers(payload.papers)
-          }
+        if (latest.length) {
+          setPapers(latest)
         }
       } catch (err) {
         clearTimeout(timeoutId)
@@ -52,7 +60,7 @@ export default function CategoryPage() {
       }
     }
     fetchPapers()
-  }, [])
+  }, [categoryId])
 
   const latestDates = useMemo(() => {
     const dates = [...new Set(papers.map((paper) => paper.submittedAt))]
@@ -2,32 +2,34 @@ import { useEffect, useState } from 'react'
 import { useParams, useNavigate, Link } from 'react-router-dom'
 import PaperDetail from './PaperDetail'
 import '../App.css'
-import fallbackPapers from '../data/papers.json'
+import { fetchPaper } from '../data/api'
+import { findPaper } from '../data/shards'
 
 export default function DetailPage() {
   const { paperId } = useParams()
   const navigate = useNavigate()
-  const [papers, setPapers] = useState(fallbackPapers)
+  const [papers, setPapers] = useState([])
   const [loading, setLoading] = useState(true)
 
   useEffect(() => {
     const fetchPapers = async () => {
-      setPapers(fallbackPapers)
+      // 先在静态分片中查找这篇论文
+      try {
+        const found = await findPaper(paperId)
+        setPapers(found ? [found] : [])
+      } catch (err) {
+        console.log('Static paper shards not available')
+      }
       setLoading(false)
       
-      // 尝试从后端获取最新数据
+      // 尝试从后端获取这篇论文的最新数据（只请求单篇论文）
       const controller = new AbortController()
       const timeoutId = setTimeout(() => controller.abort(), 3000)
       try {
-        const res = await fetch('http://127.0.0.1:8000/papers', {
-          signal: controller.signal
-        })
+        const latest = await fetchPaper(paperId, controller.signal)
         clearTimeout(timeoutId)
-        if (res.ok) {
-          const payload = await res.json()
-          if (payload?.papers?.length) {
-            setPapers(payload.papers)
-          }
+        if (latest) {
+          setPapers([latest])
         }
       } catch (err) {
         clearTimeout(timeoutId)
@@ -36,7 +38,7 @@ export default function DetailPage() {
       }
     }
     fetchPapers()
-  }, [])
+  }, [paperId])
 
   const paper = papers.find((p) => p.id === paperId)
 
@@ -1,7 +1,11 @@
 import { useEffect, useMemo, useState } from 'react'
 import { useNavigate, Link } from 'react-router-dom'
 import '../App.css'
-import fallbackPapers from '../data/papers.json'
+import { daysAgo, fetchPapersSince } from '../data/api'
+import { loadRecentPapers, recentWindowStart } from '../data/shards'
+
+// 首屏只加载最近几天的分片，历史数据不进入 JS bundle
+const RECENT_DAYS = 14
 
 const categories = [
   { id: 'ALL', title: 'All Papers', description: 'Browse every tracked submission.' },
@@ -20,8 +24,7 @@ const categoryMap = categories.reduce((acc, cat) => {
 
 export default function HomePage() {
   const navigate = useNavigate()
-  console.log('Fallback papers count:', fallbackPapers?.length || 0)
-  const [papers, setPapers] = useState(fallbackPapers)
+  const [papers, setPapers] = useState([])
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState(null)
   const [activeCategory, setActiveCategory] = useState('ALL')
@@ -30,27 +33,30 @@ export default function HomePage() {
 
   useEffect(() => {
     const fetchPapers = async () => {
-      // 先直接使用本地数据，确保立即显示
-      console.log('📚 Using local papers data:', fallbackPapers.length, 'papers')
-      setPapers(fallbackPapers)
+      // 先加载静态分片，确保立即显示；后端请求使用与分片相同的时间窗口
+      let dateFrom = daysAgo(RECENT_DAYS)
+      try {
+        const recent = await loadRecentPapers(RECENT_DAYS)
+        dateFrom = (await recentWindowStart(RECENT_DAYS)) || dateFrom
+        console.log('📚 Using static paper shards:', recent.length, 'papers')
+        setPapers(recent)
+      } catch (err) {
+        console.log('ℹ️ Static paper shards not available')
+      }
       setLoading(false)
       
-      // 然后尝试从后端获取最新数据（可选）
+      // 然后尝试从后端获取同一时间窗口内的最新数据（可选），不下载完整列表
       const controller = new AbortController()
       const timeoutId = setTimeout(() => {
         controller.abort()
       }, 3000) // 3秒超时
 
       try {
-        const res = await fetch('http://127.0.0.1:8000/papers', {
-          signal: controller.signal
-        })
+        const latest = await fetchPapersSince(dateFrom, { signal: controller.signal })
         clearTimeout(timeoutId)
-        if (!res.ok) throw new Error(`Backend responded with ${res.status}`)
-        const payload = await res.json()
-        console.log('✅ Backend returned papers:', payload?.papers?.length || 0)
-        if (payload?.papers?.length && payload.papers.length > 0) {
-          setPapers(payload.papers)
+        console.log('✅ Backend returned papers:', latest.length)
+        if (latest.length > 0) {
+          setPapers(latest)
           setError(null) // 清除错误信息
         }
       } catch (err) {
@@ -1,9 +1,6 @@
-import papers from '../data/papers.json'
 import './PaperDetail.css'
 
-export default function PaperDetail({ paperId }) {
-  const paper = papers.find((item) => item.id === paperId) || papers[0]
-
+export default function PaperDetail({ paper }) {
   if (!paper) {
     return <div className="paper-detail">Paper not found.</div>
   }
@@ -0,0 +1,119 @@
+"""Input/output fingerprints so a task whose work is already done can be skipped."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from loguru import logger
+
+from orchestrator.task_types import Task
+
+# Metadata that does not change what a task produces, so editing it keeps the task up to date.
+VOLATILE_METADATA = ("timeout",)
+
+
+class TaskFingerprints:
+  """Remembers, per task, a hash of its inputs and outputs after the last successful run.
+
+  A task opts in by listing ``metadata["inputs"]`` and ``metadata["outputs"]`` (files or
+  directories relative to ``root``). Its input fingerprint covers the task definition and the
+  content of every input; it is up to date when that fingerprint matches the stored one and
+  every output still exists unchanged. File hashes are cached by size and mtime, so unchanged
+  trees are only read once per process.
+  """
+
+  def __init__(self, path: Path, root: Optional[Path] = None) -> None:
+    self.path = Path(path)
+    self.root = Path(root) if root is not None else Path.cwd()
+    self._lock = threading.Lock()
+    self._hashes: Dict[Path, Tuple[int, int, str]] = {}
+    self._records: Optional[Dict[str, Dict[str, Any]]] = None
+
+  @staticmethod
+  def tracked(task: Task) -> bool:
+    return "inputs" in task.metadata and "outputs" in task.metadata
+
+  def inputs_fingerprint(self, task: Task) -> str:
+    definition = {
+        "description": task.description,
+        "owner": task.owner,
+        "metadata": {key: value for key, value in task.metadata.items() if key not in VOLATILE_METADATA},
+    }
+    payload = json.dumps({"task": definition, "inputs": self._digests(task.metadata["inputs"])},
+                         sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+  def outputs_fingerprint(self, task: Task) -> Optional[str]:
+    """Hash of the task's outputs, or None when one of them is missing."""
+    digests = self._digests(task.metadata["outputs"])
+    if any(digest is None for digest in digests.values()):
+      return None
+    return hashlib.sha256(json.dumps(digests, sort_keys=True).encode("utf-8")).hexdigest()
+
+  def up_to_date(self, task: Task, inputs: str) -> Optional[Dict[str, Any]]:
+    """The stored result if ``task`` ran before with these inputs and its outputs are intact."""
+    with self._lock:
+      record = self._load().get(task.task_id)
+    if record is None or record.get("inputs") != inputs:
+      return None
+    if record.get("outputs") != self.outputs_fingerprint(task):
+      return None
+    return record.get("result")
+
+  def record(self, task: Task, inputs: str, result: Optional[Dict[str, Any]]) -> None:
+    outputs = self.outputs_fingerprint(task)
+    if outputs is None:
+      logger.warning(f"Task {task.task_id} finished without all of its outputs; not fingerprinted")
+      return
+    with self._lock:
+      records = self._load()
+      records[task.task_id] = {"inputs": inputs, "outputs": outputs, "result": result}
+      self._save(records)
+
+  def _load(self) -> Dict[str, Dict[str, Any]]:
+    if self._records is None:
+      try:
+        self._records = json.loads(self.path.read_text(encoding="utf-8"))
+      except FileNotFoundError:
+        self._records = {}
+      except json.JSONDecodeError:
+        logger.warning(f"Ignoring unreadable task fingerprints in {self.path}")
+        self._records = {}
+    return self._records
+
+  def _save(self, records: Dict[str, Dict[str, Any]]) -> None:
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+    tmp.write_text(json.dumps(records, ensure_ascii=False, indent=2, default=str), encoding="utf-8")
+    os.replace(tmp, self.path)
+
+  def _digests(self, paths: Iterable[str]) -> Dict[str, Optional[str]]:
+    return {path: self._digest(self.root / path) for path in paths}
+
+  def _digest(self, target: Path) -> Optional[str]:
+    """Content hash of a file, or of every file under a directory with its relative path."""
+    if target.is_file():
+      return self._file_hash(target)
+    if not target.is_dir():
+      return None
+    tree = hashlib.sha256()
+    for path in sorted(target.rglob("*")):
+      if path.is_file():
+        tree.update(f"{path.relative_to(target).as_posix()}\0{self._file_hash(path)}\n".encode("utf-8"))
+    return tree.hexdigest()
+
+  def _file_hash(self, target: Path) -> str:
+    info = target.stat()
+    with self._lock:
+      cached = self._hashes.get(target)
+    if cached and cached[:2] == (info.st_mtime_ns, info.st_size):
+      return cached[2]
+    digest = hashlib.sha256(target.read_bytes()).hexdigest()
+    with self._lock:
+      self._hashes[target] = (info.st_mtime_ns, info.st_size, digest)
+    return digest
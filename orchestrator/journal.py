@@ -0,0 +1,128 @@
+"""Append-only run journal so an interrupted orchestrator run can resume."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from loguru import logger
+
+
+@dataclass
+class ResumeState:
+  """Last consistent state of an unfinished run, rebuilt from the journal."""
+
+  run_id: str
+  statuses: Dict[str, str] = field(default_factory=dict)
+  results: Dict[str, Optional[Dict[str, Any]]] = field(default_factory=dict)
+
+
+def plan_fingerprint(tasks: List[Dict[str, Any]]) -> str:
+  """Stable hash of a plan so a resumed run only matches the exact same task list."""
+  payload = json.dumps(tasks, sort_keys=True, ensure_ascii=False, default=str)
+  return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RunJournal:
+  """JSON-lines log of run starts, task transitions and run completions."""
+
+  def __init__(self, path: Path, fsync: bool = True) -> None:
+    self.path = Path(path)
+    self.fsync = fsync
+    self._lock = threading.Lock()
+
+  def start_run(self, requirement: str, fingerprint: str, task_ids: List[str]) -> str:
+    run_id = uuid.uuid4().hex
+    with self._lock:
+      # An unfinished run of an older plan for this requirement (e.g. yesterday's dated prompt)
+      # can never be resumed, so it is dropped here rather than carried along forever.
+      self._compact(lambda header: header.get("requirement") == requirement
+                    and header.get("fingerprint") != fingerprint)
+      self._append({"event": "run_started", "run_id": run_id, "requirement": requirement,
+                    "fingerprint": fingerprint, "tasks": task_ids})
+    return run_id
+
+  def record(self, run_id: str, task_id: str, status: str, result: Optional[Dict[str, Any]] = None) -> None:
+    with self._lock:
+      self._append({"event": "task", "run_id": run_id, "task_id": task_id, "status": status, "result": result})
+
+  def finish_run(self, run_id: str) -> None:
+    with self._lock:
+      self._append({"event": "run_finished", "run_id": run_id})
+
+  def resume(self, requirement: str, fingerprint: str) -> Optional[ResumeState]:
+    """Return the newest unfinished run for the same requirement and plan, if any."""
+    with self._lock:
+      runs = self._compact()
+    for run_id in reversed(list(runs)):
+      header, transitions = runs[run_id]
+      if header.get("requirement") != requirement or header.get("fingerprint") != fingerprint:
+        continue
+      state = ResumeState(run_id=run_id)
+      for entry in transitions:
+        state.statuses[entry["task_id"]] = entry["status"]
+        if entry.get("result") is not None:
+          state.results[entry["task_id"]] = entry["result"]
+      return state
+    return None
+
+  def _append(self, entry: Dict[str, Any]) -> None:
+    entry = {"ts": datetime.now().isoformat(timespec="seconds"), **entry}
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    with self.path.open("a", encoding="utf-8") as fh:
+      fh.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+      fh.flush()
+      if self.fsync:
+        os.fsync(fh.fileno())
+
+  def _read(self) -> List[Dict[str, Any]]:
+    if not self.path.exists():
+      return []
+    entries = []
+    with self.path.open("r", encoding="utf-8") as fh:
+      for line in fh:
+        try:
+          entries.append(json.loads(line))
+        except json.JSONDecodeError:
+          # A torn line from a crash mid-write; the entries around it are still consistent.
+          logger.warning(f"Ignoring partial journal entry in {self.path}")
+    return entries
+
+  def _unfinished_runs(self) -> Dict[str, Any]:
+    runs: Dict[str, Any] = {}
+    for entry in self._read():
+      run_id = entry.get("run_id")
+      if entry.get("event") == "run_started":
+        runs[run_id] = (entry, [])
+      elif entry.get("event") == "task" and run_id in runs:
+        runs[run_id][1].append(entry)
+      elif entry.get("event") == "run_finished":
+        runs.pop(run_id, None)
+    return runs
+
+  def _compact(self, stale: Optional[Callable[[Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
+    """Drop finished runs, and unfinished ones whose header ``stale`` matches, so the journal only
+    grows with work that may still be resumed."""
+    runs = self._unfinished_runs()
+    if stale is not None:
+      dropped = [run_id for run_id, (header, _) in runs.items() if stale(header)]
+      for run_id in dropped:
+        del runs[run_id]
+      if dropped:
+        logger.info(f"Dropping {len(dropped)} unfinished run(s) of a superseded plan from {self.path}")
+    if not self.path.exists():
+      return runs
+    lines = []
+    for header, transitions in runs.values():
+      lines.extend(json.dumps(entry, ensure_ascii=False, default=str) + "\n" for entry in [header, *transitions])
+    tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+    tmp.write_text("".join(lines), encoding="utf-8")
+    os.replace(tmp, self.path)
+    return runs
@@ -2,8 +2,11 @@
 
 from __future__ import annotations
 
-from collections import deque
-from typing import Deque, Dict, List
+import contextvars
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, List, Optional, Tuple, Union
 
 from loguru import logger
 
@@ -11,27 +14,134 @@ from agents.base_agent import AgentMessage
 from agents.code_evaluation_agent import CodeEvaluationAgent
 from agents.code_generation_agent import CodeGenerationAgent
 from agents.planning_agent import PlanningAgent
-from orchestrator.task_types import Task, TaskStatus
+from orchestrator.fingerprints import TaskFingerprints
+from orchestrator.journal import RunJournal, plan_fingerprint
+from orchestrator.task_types import DONE_STATUSES, Task, TaskStatus
+from tools.metrics import TASK_DURATION
+from tools.resilience import Deadline, deadline_scope
+
+# Upper bound on tasks running at once for each owner in concurrent mode.
+DEFAULT_OWNER_LIMITS: Dict[str, int] = {
+    "code_generation": 4,
+    "code_evaluation": 1,
+}
+# How often the concurrent scheduler wakes up to notice tasks past their deadline or cancelled.
+DEADLINE_POLL_SECONDS = 0.25
 
 
 class MultiAgentOrchestrator:
+  """Runs planned tasks in dependency order.
+
+  A run is bounded by ``run_timeout`` seconds and each task by its ``metadata["timeout"]``. The
+  task's deadline is current (see ``tools.resilience.current_deadline``) while its agent runs,
+  so tools shorten their own timeouts to it and stop at their next cancellation point once it is
+  cancelled. A task that misses its deadline, raises, or whose agent reports
+  ``metadata["status"] == "failed"`` (e.g. a broken build) is marked FAILED and its dependents
+  SKIPPED; only an exception stops the run.
+
+  With ``fingerprints``, a task declaring ``metadata["inputs"]`` and ``metadata["outputs"]`` is
+  marked UP_TO_DATE instead of run when neither changed since its last successful run, and its
+  previous result is reused.
+  """
+
   def __init__(self, planning_agent: PlanningAgent, code_agent: CodeGenerationAgent,
-               eval_agent: CodeEvaluationAgent) -> None:
+               eval_agent: CodeEvaluationAgent, owner_limits: Optional[Dict[str, int]] = None,
+               journal: Optional[RunJournal] = None, run_timeout: Optional[float] = None,
+               fingerprints: Optional[TaskFingerprints] = None) -> None:
     self.planning_agent = planning_agent
     self.code_agent = code_agent
     self.eval_agent = eval_agent
+    self.owner_limits = {**DEFAULT_OWNER_LIMITS, **(owner_limits or {})}
+    self.journal = journal
+    self.run_timeout = run_timeout
+    self.fingerprints = fingerprints
+    self.run_id: Optional[str] = None
     self.tasks: Dict[str, Task] = {}
     self.queue: Deque[str] = deque()
+    # Deadline of the run in progress; a cancel() arriving before run() is kept for it.
+    self.deadline: Optional[Deadline] = None
+    self._pending_cancel: Optional[str] = None
+    self._cancel_lock = threading.Lock()
 
   def bootstrap(self, requirement: str) -> None:
     planner_msg = AgentMessage(sender="user", content=requirement)
     plan = self.planning_agent.think(planner_msg)
-    for payload in plan.metadata.get("tasks", []):
+    payloads = plan.metadata.get("tasks", [])
+    for payload in payloads:
       task = Task(**payload)
       self.tasks[task.task_id] = task
+    if self.journal is not None:
+      self._attach_journal(requirement, payloads)
     self._refresh_queue()
     logger.info(f"Planner populated {len(self.tasks)} tasks")
 
+  def _attach_journal(self, requirement: str, payloads: List[Dict[str, Any]]) -> None:
+    fingerprint = plan_fingerprint(payloads)
+    state = self.journal.resume(requirement, fingerprint)
+    if state is None:
+      self.run_id = self.journal.start_run(requirement, fingerprint, [p["task_id"] for p in payloads])
+      return
+    self.run_id = state.run_id
+    restored = 0
+    for task_id, status in state.statuses.items():
+      # Only completed work is trusted; anything interrupted mid-flight runs again.
+      if task_id in self.tasks and TaskStatus(status) in DONE_STATUSES:
+        self.tasks[task_id].status = TaskStatus(status)
+        self.tasks[task_id].result = state.results.get(task_id)
+        restored += 1
+    logger.info(f"Resuming run {self.run_id}: {restored} completed tasks restored from journal")
+
+  def _transition(self, task: Task, status: TaskStatus) -> None:
+    task.status = status
+    if self.journal is not None and self.run_id is not None:
+      self.journal.record(self.run_id, task.task_id, status.value, task.result)
+
+  def _finish_run(self) -> None:
+    if self.journal is None or self.run_id is None:
+      return
+    if all(task.status in DONE_STATUSES for task in self.tasks.values()):
+      self.journal.finish_run(self.run_id)
+      self.run_id = None
+
+  def cancel(self, reason: str = "cancelled") -> None:
+    """Cancel the run in progress, or the next one: no new tasks start and running ones stop."""
+    with self._cancel_lock:
+      deadline = self.deadline
+      if deadline is None:
+        self._pending_cancel = reason
+    logger.warning(f"Cancelling run: {reason}")
+    if deadline is not None:
+      deadline.cancel(reason)
+
+  def _skip_dependents(self, task_id: str) -> List[str]:
+    dependents: Dict[str, List[str]] = defaultdict(list)
+    for task in self.tasks.values():
+      for dep in task.depends_on:
+        dependents[dep].append(task.task_id)
+    skipped: List[str] = []
+    stack = [task_id]
+    while stack:
+      for child in dependents[stack.pop()]:
+        task = self.tasks[child]
+        if task.status == TaskStatus.PENDING:
+          self._transition(task, TaskStatus.SKIPPED)
+          skipped.append(child)
+          stack.append(child)
+    return skipped
+
+  def _fail(self, task: Task, error: Union[BaseException, str]) -> None:
+    self._transition(task, TaskStatus.FAILED)
+    logger.error(f"Task {task.task_id} failed: {error}")
+    skipped = self._skip_dependents(task.task_id)
+    if skipped:
+      logger.warning(f"Skipped {len(skipped)} tasks depending on {task.task_id}: {', '.join(skipped)}")
+
+  def _settle(self, task: Task, status: TaskStatus) -> None:
+    if status == TaskStatus.FAILED:
+      self._fail(task, f"{task.owner} reported status 'failed'")
+    else:
+      self._transition(task, status)
+
   def _refresh_queue(self) -> None:
     self.queue.clear()
     for task_id, task in self.tasks.items():
@@ -39,27 +149,165 @@ class MultiAgentOrchestrator:
         self.queue.append(task_id)
 
   def _dependencies_met(self, task: Task) -> bool:
-    return all(self.tasks[dep].status == TaskStatus.COMPLETED for dep in task.depends_on)
+    return all(self.tasks[dep].status in DONE_STATUSES for dep in task.depends_on)
+
+  def _task_deadline(self, task: Task) -> Deadline:
+    return Deadline(task.metadata.get("timeout"), parent=self.deadline)
+
+  def _execute(self, task: Task, deadline: Deadline) -> Tuple[Optional[Dict[str, Any]], TaskStatus]:
+    with logger.contextualize(task_id=task.task_id), deadline_scope(deadline):
+      with TASK_DURATION.time(task_id=task.task_id, owner=task.owner, status=TaskStatus.FAILED.value) as labels:
+        deadline.check(f"Task {task.task_id}")
+        inputs = None
+        if self.fingerprints is not None and self.fingerprints.tracked(task):
+          inputs = self.fingerprints.inputs_fingerprint(task)
+          previous = self.fingerprints.up_to_date(task, inputs)
+          if previous is not None:
+            logger.info(f"{task.task_id} is up to date; reusing its previous result")
+            labels["status"] = TaskStatus.UP_TO_DATE.value
+            return previous, TaskStatus.UP_TO_DATE
+        logger.info(f"Dispatching {task.task_id} to {task.owner}")
+        agent = self.code_agent if task.owner == "code_generation" else self.eval_agent
+        metadata = {"task_id": task.task_id, **task.metadata}
+        result = agent.think(AgentMessage(sender="orchestrator", content=task.description, metadata=metadata))
+        # A result that arrives after the budget ran out (e.g. a killed build) does not count.
+        deadline.check(f"Task {task.task_id}")
+        # A failed check (e.g. a broken build) keeps its result but fails the task and is not reused.
+        if result.metadata.get("status") == "failed":
+          return result.metadata, TaskStatus.FAILED
+        if inputs is not None:
+          self.fingerprints.record(task, inputs, result.metadata)
+        labels["status"] = TaskStatus.COMPLETED.value
+      return result.metadata, TaskStatus.COMPLETED
+
+  def run(self, concurrent: bool = False, timeout: Optional[float] = None) -> None:
+    """Execute every runnable task, optionally fanning independent tasks out to a worker pool.
 
-  def run(self) -> None:
+    ``timeout`` overrides ``run_timeout`` for this run. Raises the first task failure, which is
+    DeadlineExceeded or Cancelled (both in tools.resilience) when a budget ran out or the run
+    was cancelled.
+    """
+    with self._cancel_lock:
+      self.deadline = Deadline(self.run_timeout if timeout is None else timeout)
+      reason, self._pending_cancel = self._pending_cancel, None
+    if reason is not None:
+      self.deadline.cancel(reason)
+    try:
+      if concurrent:
+        self._run_concurrent()
+      else:
+        self._run_sequential()
+    finally:
+      with self._cancel_lock:
+        self.deadline = None
+
+  def _run_sequential(self) -> None:
+    # Cooperative only: a task is stopped by its tools noticing the deadline, not preempted.
     while self.queue:
       task_id = self.queue.popleft()
       task = self.tasks[task_id]
-      task.status = TaskStatus.IN_PROGRESS
-      logger.info(f"Dispatching {task_id} to {task.owner}")
-      if task.owner == "code_generation":
-        metadata = {"task_id": task.task_id, **task.metadata}
-        result = self.code_agent.think(AgentMessage(sender="orchestrator", content=task.description,
-                                                    metadata=metadata))
-      else:
-        metadata = {"task_id": task.task_id, **task.metadata}
-        result = self.eval_agent.think(AgentMessage(sender="orchestrator", content=task.description,
-                                                    metadata=metadata))
-      task.result = result.metadata
-      task.status = TaskStatus.COMPLETED
+      self.deadline.check("Run")
+      self._transition(task, TaskStatus.IN_PROGRESS)
+      try:
+        task.result, status = self._execute(task, self._task_deadline(task))
+      except Exception as exc:
+        self._fail(task, exc)
+        self._refresh_queue()
+        raise
+      self._settle(task, status)
       self._refresh_queue()
+    self._finish_run()
 
-  def summary(self) -> List[Dict[str, str]]:
-    return [{"task_id": tid, "status": task.status, "owner": task.owner} for tid, task in self.tasks.items()]
+  def _owner_limit(self, owner: str) -> int:
+    return max(1, self.owner_limits.get(owner, 1))
 
+  def _run_concurrent(self) -> None:
+    # In-degree bookkeeping: each completion only touches its direct dependents.
+    indegree: Dict[str, int] = {}
+    dependents: Dict[str, List[str]] = defaultdict(list)
+    for task_id, task in self.tasks.items():
+      if task.status != TaskStatus.PENDING:
+        continue
+      unmet = [dep for dep in task.depends_on if self.tasks[dep].status not in DONE_STATUSES]
+      indegree[task_id] = len(unmet)
+      for dep in unmet:
+        dependents[dep].append(task_id)
+    ready: Deque[str] = deque(task_id for task_id, count in indegree.items() if count == 0)
+
+    owners = {self.tasks[task_id].owner for task_id in indegree}
+    max_workers = max(1, sum(self._owner_limit(owner) for owner in owners))
+    running: Dict[Future, str] = {}
+    deadlines: Dict[str, Deadline] = {}
+    in_flight: Counter = Counter()
+    error: Optional[BaseException] = None
+    abandoned = False
 
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="orchestrator")
+    try:
+      while ready or running:
+        if error is None:
+          try:
+            self.deadline.check("Run")
+          except Exception as exc:
+            error = exc
+        if error is None:
+          deferred: Deque[str] = deque()
+          while ready:
+            task_id = ready.popleft()
+            task = self.tasks[task_id]
+            if in_flight[task.owner] >= self._owner_limit(task.owner):
+              deferred.append(task_id)
+              continue
+            self._transition(task, TaskStatus.IN_PROGRESS)
+            in_flight[task.owner] += 1
+            deadlines[task_id] = deadline = self._task_deadline(task)
+            # Workers run in a copy of the caller's context so log correlation IDs (job_id) carry over.
+            running[pool.submit(contextvars.copy_context().run, self._execute, task, deadline)] = task_id
+          ready = deferred
+        if not running:
+          break
+        done, _ = wait(running, timeout=DEADLINE_POLL_SECONDS, return_when=FIRST_COMPLETED)
+        for future in done:
+          task = self.tasks[running.pop(future)]
+          in_flight[task.owner] -= 1
+          deadlines.pop(task.task_id)
+          try:
+            task.result, status = future.result()
+          except Exception as exc:
+            # Stop scheduling new work, let in-flight tasks drain, then surface the first failure.
+            self._fail(task, exc)
+            error = error or exc
+            continue
+          self._settle(task, status)
+          if status not in DONE_STATUSES:
+            continue
+          for child in dependents[task.task_id]:
+            indegree[child] -= 1
+            if indegree[child] == 0:
+              ready.append(child)
+        for future, task_id in list(running.items()):
+          deadline = deadlines[task_id]
+          if future.done() or not (deadline.cancelled or deadline.expired()):
+            continue
+          # Fail the task now rather than wait for its worker, which stops at its next
+          # cancellation point; whatever it returns afterwards is discarded.
+          try:
+            deadline.check(f"Task {task_id}")
+          except Exception as exc:
+            deadline.cancel(str(exc))
+            task = self.tasks[running.pop(future)]
+            in_flight[task.owner] -= 1
+            deadlines.pop(task_id)
+            abandoned = True
+            self._fail(task, exc)
+            error = error or exc
+    finally:
+      pool.shutdown(wait=not abandoned, cancel_futures=True)
+
+    self._refresh_queue()
+    if error is not None:
+      raise error
+    self._finish_run()
+
+  def summary(self) -> List[Dict[str, str]]:
+    return [{"task_id": tid, "status": task.status, "owner": task.owner} for tid, task in self.tasks.items()]
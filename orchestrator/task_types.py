@@ -12,6 +12,14 @@ class TaskStatus(str, Enum):
   IN_PROGRESS = "in_progress"
   COMPLETED = "completed"
   FAILED = "failed"
+  # Never started because a task it depends on failed.
+  SKIPPED = "skipped"
+  # Not run: inputs unchanged since the last successful run and outputs intact; result reused.
+  UP_TO_DATE = "up_to_date"
+
+
+# Statuses that satisfy a dependency.
+DONE_STATUSES = frozenset({TaskStatus.COMPLETED, TaskStatus.UP_TO_DATE})
 
 
 @dataclass
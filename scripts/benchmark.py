@@ -0,0 +1,390 @@
+"""Benchmark the orchestrator scheduler, the /papers API and backend startup, optionally against a stored baseline.
+
+Examples:
+    python scripts/benchmark.py --output state/bench.json
+    python scripts/benchmark.py --baseline state/bench.json --tolerance 0.25
+    python scripts/benchmark.py --suite api --corpus-sizes 1000,1000000
+    python scripts/benchmark.py --suite startup --startup-runs 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from loguru import logger  # noqa: E402
+
+from agents.base_agent import AgentMessage  # noqa: E402
+from orchestrator.orchestrator import MultiAgentOrchestrator  # noqa: E402
+
+CATEGORIES = ["cs.AI", "cs.LG", "cs.CV", "cs.CL", "cs.SE", "cs.AR", "cs.CC", "cs.RO", "cs.DB", "cs.NI"]
+WORDS = ("graph neural network transformer diffusion retrieval agent benchmark robust efficient "
+         "scalable sparse attention language vision reinforcement learning compiler verification").split()
+
+
+# --- orchestrator -------------------------------------------------------------------------------
+
+def build_dag(size, seed=0, max_fan_in=4, window=64):
+    """Random DAG as planner task payloads.
+
+    Each node depends on 0..max_fan_in earlier nodes drawn mostly from a recent window (long
+    chains) and sometimes from anywhere before it (hubs with large fan-out).
+    """
+    rng = random.Random(seed)
+    tasks = []
+    for index in range(size):
+        depends_on = set()
+        if index:
+            for _ in range(rng.randint(0, min(max_fan_in, index))):
+                if rng.random() < 0.8:
+                    depends_on.add(rng.randint(max(0, index - window), index - 1))
+                else:
+                    depends_on.add(rng.randint(0, index - 1))
+        tasks.append({
+            "task_id": f"t{index}",
+            "title": f"Task {index}",
+            "description": "synthetic",
+            "owner": "code_evaluation" if index % 10 == 9 else "code_generation",
+            "depends_on": [f"t{dep}" for dep in sorted(depends_on)],
+        })
+    return tasks
+
+
+class StubPlanner:
+    def __init__(self, tasks):
+        self.tasks = tasks
+
+    def think(self, message):
+        return AgentMessage(sender="planner", content="plan-ready", metadata={"tasks": self.tasks})
+
+
+class StubWorker:
+    """Agent that returns immediately, so the measured time is scheduling overhead."""
+
+    def __init__(self, work_seconds=0.0):
+        self.work_seconds = work_seconds
+
+    def think(self, message):
+        if self.work_seconds:
+            time.sleep(self.work_seconds)
+        return AgentMessage(sender="stub", content="task-complete", metadata={"task_id": message.metadata["task_id"]})
+
+
+def bench_orchestrator(sizes, modes, seed):
+    results = []
+    for size in sizes:
+        tasks = build_dag(size, seed=seed)
+        edges = sum(len(task["depends_on"]) for task in tasks)
+        for mode in modes:
+            orchestrator = MultiAgentOrchestrator(StubPlanner(tasks), StubWorker(), StubWorker())
+            started = time.perf_counter()
+            orchestrator.bootstrap("benchmark")
+            bootstrapped = time.perf_counter()
+            orchestrator.run(concurrent=(mode == "concurrent"))
+            finished = time.perf_counter()
+            assert all(task.status == "completed" for task in orchestrator.tasks.values())
+            run_seconds = finished - bootstrapped
+            results.append({
+                "name": f"orchestrator.{mode}.n{size}",
+                "nodes": size,
+                "edges": edges,
+                "bootstrap_seconds": round(bootstrapped - started, 6),
+                "run_seconds": round(run_seconds, 6),
+                "per_task_us": round(run_seconds / size * 1e6, 2),
+            })
+            print(f"  {results[-1]['name']}: {run_seconds:.4f}s ({results[-1]['per_task_us']} us/task)")
+    return results
+
+
+# --- /papers API --------------------------------------------------------------------------------
+
+def build_corpus(size, seed=0):
+    rng = random.Random(seed)
+    papers = []
+    for index in range(size):
+        paper_id = f"25{index // 100000:02d}.{index % 100000:05d}"
+        papers.append({
+            "id": paper_id,
+            "title": " ".join(rng.choice(WORDS) for _ in range(8)).capitalize(),
+            "authors": [f"Author {rng.randint(1, 5000)}" for _ in range(rng.randint(2, 5))],
+            "submittedAt": f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "abstract": " ".join(rng.choice(WORDS) for _ in range(40)),
+            "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+            "pdfUrl": f"https://arxiv.org/pdf/{paper_id}.pdf",
+        })
+    return papers
+
+
+def _percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def _measure(client, requests, path, params=None, headers=None, expect=200):
+    """Time ``requests`` GETs; returns (samples, raw body bytes, headers) of the last one.
+
+    The body is read raw so the client does not spend the measured time decompressing it.
+    """
+    samples = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        async with client.stream("GET", path, params=params, headers=headers) as response:
+            raw = b"".join([chunk async for chunk in response.aiter_raw()])
+        samples.append(time.perf_counter() - started)
+        assert response.status_code == expect, (path, params, response.status_code)
+    return samples, raw, response.headers
+
+
+async def _bench_api_corpus(main, size, requests, seed):
+    import httpx
+    from backend.paper_store import PaperStore
+
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_file = Path(tmp) / "papers.json"
+        corpus_file.write_text(json.dumps(build_corpus(size, seed)), encoding="utf-8")
+        main.paper_store = PaperStore(corpus_file)
+        started = time.perf_counter()
+        main.paper_store.snapshot()
+        load_seconds = time.perf_counter() - started
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            etag = (await _measure(client, 1, "/papers"))[2]["etag"]
+            # The full list is large at 1M papers; a few requests are enough to see the trend.
+            full_requests = max(3, requests // 10) if size >= 100000 else requests
+            scenarios = {
+                "full": await _measure(client, full_requests, "/papers", headers={"accept-encoding": "identity"}),
+                "full_gzip": await _measure(client, full_requests, "/papers", headers={"accept-encoding": "gzip"}),
+                "not_modified": await _measure(client, requests, "/papers", headers={"if-none-match": etag},
+                                               expect=304),
+                "category_page": await _measure(client, requests, "/papers",
+                                                params={"category": "cs.CV", "limit": 50}),
+                "date_range_page": await _measure(client, requests, "/papers",
+                                                  params={"date_from": "2025-03-01", "date_to": "2025-05-31",
+                                                          "limit": 50}),
+            }
+            first_page = json.loads(scenarios["category_page"][1])
+            scenarios["cursor_page"] = await _measure(
+                client, requests, "/papers",
+                params={"category": "cs.CV", "limit": 50, "cursor": first_page["next_cursor"]})
+
+    results = [{
+        "name": f"api.papers.load.n{size}",
+        "papers": size,
+        "seconds": round(load_seconds, 6),
+    }]
+    for scenario, (samples, raw, _) in scenarios.items():
+        results.append({
+            "name": f"api.papers.{scenario}.n{size}",
+            "papers": size,
+            "requests": len(samples),
+            "bytes": len(raw),
+            "mean_ms": round(statistics.mean(samples) * 1000, 3),
+            "p50_ms": round(_percentile(samples, 0.5) * 1000, 3),
+            "p95_ms": round(_percentile(samples, 0.95) * 1000, 3),
+        })
+        print(f"  {results[-1]['name']}: p50 {results[-1]['p50_ms']}ms p95 {results[-1]['p95_ms']}ms")
+    return results
+
+
+def bench_api(sizes, requests, seed):
+    logger.disable("")
+    import backend.main as main
+
+    logger.enable("")
+    _quiet_logs()
+    original_store = main.paper_store
+    try:
+        results = []
+        for size in sizes:
+            results.extend(asyncio.run(_bench_api_corpus(main, size, requests, seed)))
+        return results
+    finally:
+        main.paper_store = original_store
+
+
+# --- startup ------------------------------------------------------------------------------------
+
+# Runs in a fresh interpreter: time ``import backend.main``, then the first /papers request.
+STARTUP_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import backend.main as main
+imported = time.perf_counter()
+import asyncio, httpx
+
+async def first_request():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        began = time.perf_counter()
+        response = await client.get("/papers")
+        return response.status_code, time.perf_counter() - began
+
+status, first_request_seconds = asyncio.run(first_request())
+print("STARTUP " + json.dumps({"import_seconds": imported - started, "first_request_seconds": first_request_seconds,
+                              "status": status, "openai_loaded": "openai" in sys.modules}))
+"""
+
+
+def _import_profile(stderr, top):
+    """Modules imported directly by backend.main, by cumulative ``-X importtime`` microseconds.
+
+    ``-X importtime`` lists a module's imports before the module itself.
+    """
+    children, pending = [], []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|", 2)
+        name = name[1:]
+        level = (len(name) - len(name.lstrip(" "))) // 2
+        if not cumulative.strip().isdigit():
+            continue
+        if level == 1:
+            pending.append((int(cumulative), name.strip()))
+        elif level == 0:
+            if name.strip() == "backend.main":
+                children = pending
+            pending = []
+    return [{"module": name, "ms": round(us / 1000, 2)} for us, name in sorted(children, reverse=True)[:top]]
+
+
+def bench_startup(runs, top=10):
+    """Cold start of ``backend.main`` in fresh interpreters, without an OPENAI_API_KEY."""
+    env = {key: value for key, value in os.environ.items() if key != "OPENAI_API_KEY"}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(BASE_DIR), env.get("PYTHONPATH")]))
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", STARTUP_PROBE], cwd=BASE_DIR, env=env,
+                              capture_output=True, text=True)
+        process_seconds = time.perf_counter() - started
+        probe = next((line[len("STARTUP "):] for line in proc.stdout.splitlines() if line.startswith("STARTUP ")),
+                     None)
+        if proc.returncode or probe is None:
+            raise RuntimeError(f"startup probe failed ({proc.returncode}): {proc.stderr[-2000:]}")
+        samples.append({**json.loads(probe), "process_seconds": process_seconds, "stderr": proc.stderr})
+
+    def median_ms(field):
+        return round(statistics.median(sample[field] for sample in samples) * 1000, 2)
+
+    result = {
+        "name": "startup.backend_main",
+        "runs": runs,
+        "import_ms": median_ms("import_seconds"),
+        "first_request_ms": median_ms("first_request_seconds"),
+        "process_ms": median_ms("process_seconds"),
+        "first_request_status": samples[-1]["status"],
+        "openai_loaded": samples[-1]["openai_loaded"],
+        "top_imports": _import_profile(samples[-1]["stderr"], top),
+    }
+    print(f"  {result['name']}: import {result['import_ms']}ms, first /papers {result['first_request_ms']}ms, "
+          f"process {result['process_ms']}ms (openai loaded: {result['openai_loaded']})")
+    for entry in result["top_imports"]:
+        print(f"    {entry['ms']:>9.2f}ms  {entry['module']}")
+    return [result]
+
+
+# --- reporting ----------------------------------------------------------------------------------
+
+# Lower is better for every compared field; the value is the absolute change treated as noise.
+COMPARED_FIELDS = {"run_seconds": 0.002, "seconds": 0.002, "p50_ms": 2.0, "p95_ms": 2.0,
+                   "import_ms": 20.0, "first_request_ms": 5.0}
+
+
+def compare(results, baseline, tolerance):
+    """Return (name, field, baseline, current, ratio) for every measurement slower than allowed."""
+    previous = {entry["name"]: entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in results:
+        before = previous.get(entry["name"])
+        if before is None:
+            continue
+        for field, noise in COMPARED_FIELDS.items():
+            if field not in entry or not before.get(field):
+                continue
+            ratio = entry[field] / before[field]
+            if ratio > 1 + tolerance and entry[field] - before[field] > noise:
+                regressions.append((entry["name"], field, before[field], entry[field], round(ratio, 2)))
+    return regressions
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _quiet_logs():
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+
+
+def _int_list(value):
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--suite", choices=("all", "orchestrator", "api", "startup"), default="all")
+    parser.add_argument("--dag-sizes", type=_int_list, default=[10, 100, 1000, 10000])
+    parser.add_argument("--modes", default="sequential,concurrent")
+    parser.add_argument("--corpus-sizes", type=_int_list, default=[1000, 10000, 100000])
+    parser.add_argument("--requests", type=int, default=50, help="requests per API scenario")
+    parser.add_argument("--startup-runs", type=int, default=5, help="fresh interpreters for the startup suite")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, help="write results as JSON (use as a later --baseline)")
+    parser.add_argument("--baseline", type=Path, help="compare against a previous --output file")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown ratio, e.g. 0.2 = 20%%")
+    args = parser.parse_args()
+
+    _quiet_logs()
+    results = []
+    if args.suite in ("all", "orchestrator"):
+        print("Orchestrator scheduling (stub agents):")
+        results.extend(bench_orchestrator(args.dag_sizes, args.modes.split(","), args.seed))
+    if args.suite in ("all", "api"):
+        print("/papers via in-process ASGI client:")
+        results.extend(bench_api(args.corpus_sizes, args.requests, args.seed))
+    if args.suite in ("all", "startup"):
+        print("backend.main cold start (fresh interpreter, no OPENAI_API_KEY):")
+        results.extend(bench_startup(args.startup_runs))
+
+    report = {
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text(encoding="utf-8")), args.tolerance)
+        if regressions:
+            print(f"REGRESSIONS against {args.baseline} (tolerance {args.tolerance:.0%}):")
+            for name, field, before, current, ratio in regressions:
+                print(f"  {name} {field}: {before} -> {current} (x{ratio})")
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
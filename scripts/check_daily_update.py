@@ -1,29 +1,43 @@
 """Check if daily update is working correctly."""
 
 import json
+import sys
 from datetime import datetime
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from tools.paper_repository import PaperRepository  # noqa: E402
+
 PAPERS_FILE = BASE_DIR / "frontend" / "src" / "data" / "papers.json"
+PAPERS_DB = BASE_DIR / "state" / "papers.db"
+
+
+def load_summary(today):
+    """Return (total, earliest, latest, today's papers) from the archive, or papers.json without one."""
+    if PAPERS_DB.exists():
+        repository = PaperRepository(PAPERS_DB)
+        stats = repository.stats()
+        today_papers = repository.query(date_from=today, date_to=today)
+        return stats["total"], stats["earliest"], stats["latest"], today_papers
+    data = json.loads(PAPERS_FILE.read_text(encoding="utf-8"))
+    dates = [p["submittedAt"] for p in data]
+    today_papers = [p for p in data if p["submittedAt"] == today]
+    return len(data), min(dates), max(dates), today_papers
 
 
 def check_daily_update():
-    """Check if papers.json contains today's date."""
-    if not PAPERS_FILE.exists():
+    """Check if the paper archive (or papers.json) contains today's date."""
+    if not PAPERS_DB.exists() and not PAPERS_FILE.exists():
         print("ERROR: papers.json not found!")
         return False
     
     today = datetime.now().strftime("%Y-%m-%d")
-    data = json.loads(PAPERS_FILE.read_text(encoding="utf-8"))
-    
-    dates = [p["submittedAt"] for p in data]
-    latest_date = max(dates)
-    earliest_date = min(dates)
-    today_papers = [p for p in data if p["submittedAt"] == today]
+    total, earliest_date, latest_date, today_papers = load_summary(today)
     
     print(f"Today's date: {today}")
-    print(f"Total papers: {len(data)}")
+    print(f"Total papers: {total}")
     print(f"Latest date in papers: {latest_date}")
     print(f"Earliest date in papers: {earliest_date}")
     print(f"Papers with today's date: {len(today_papers)}")
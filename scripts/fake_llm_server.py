@@ -0,0 +1,122 @@
+"""Minimal OpenAI-compatible chat completion server that returns synthetic paper metadata.
+
+Used with LLM_TRANSPORT=local to run the whole pipeline offline:
+    python scripts/fake_llm_server.py --port 8001 --latency 0.5
+    LLM_TRANSPORT=local uvicorn backend.main:app
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import JSONResponse, StreamingResponse  # noqa: E402
+
+CATEGORIES = ["cs.AI", "cs.LG", "cs.CV", "cs.CL", "cs.SE", "cs.AR", "cs.CC"]
+TOPICS = ["Sparse Attention", "Diffusion Policies", "Retrieval Agents", "Graph Transformers",
+          "Compiler Autotuning", "Federated Fine-Tuning", "Neural Verification", "Robust Vision Models"]
+WORDS = ("adaptive sparse attention diffusion retrieval agents graph transformer compiler federated "
+         "verification robust vision language planning memory efficient scalable causal contrastive "
+         "benchmark kernel quantization distillation multimodal reasoning policy latent streaming").split()
+# Seconds before the first byte; settable with --latency or FAKE_LLM_LATENCY.
+LATENCY = float(os.getenv("FAKE_LLM_LATENCY", "0"))
+# Characters per streamed chunk, roughly one token's worth of JSON.
+CHUNK_CHARS = 24
+
+app = FastAPI(title="Fake LLM")
+
+
+def generate_papers(prompt, rng):
+    """Papers following the count, date and ID-range rules stated in the planner prompt."""
+    count_match = re.search(r"with (\d+) unique", prompt)
+    count = int(count_match[1]) if count_match else 15
+    today_match = re.search(r"today's date (\d{4}-\d{2}-\d{2})", prompt)
+    today = datetime.strptime(today_match[1], "%Y-%m-%d") if today_match else datetime.now()
+    id_range = re.search(r"between (\d{5}) and (\d{5})", prompt)
+    low, high = (int(id_range[1]), int(id_range[2])) if id_range else (10000, 99999)
+    numbers = rng.sample(range(low, high + 1), min(count, high - low + 1))
+    papers = []
+    for index, number in enumerate(numbers):
+        submitted = today if index < 3 else today - timedelta(days=rng.randint(1, 75))
+        paper_id = f"{today:%y%m}.{number:05d}"
+        topic = rng.choice(TOPICS)
+        # Random wording keeps separate papers from looking like near duplicates of each other.
+        papers.append({
+            "id": paper_id,
+            "title": f"{topic}: " + " ".join(rng.choice(WORDS) for _ in range(6)).capitalize(),
+            "authors": [f"Author {rng.randint(1, 999)}" for _ in range(rng.randint(2, 5))],
+            "submittedAt": submitted.strftime("%Y-%m-%d"),
+            "abstract": f"We study {topic.lower()} with " + " ".join(rng.choice(WORDS) for _ in range(30)) + ".",
+            "categories": rng.sample(CATEGORIES, rng.randint(1, 3)),
+            "pdfUrl": f"https://arxiv.org/pdf/{paper_id}.pdf",
+        })
+    return papers
+
+
+def _completion(model, content, completion_id, created):
+    return {
+        "id": completion_id,
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [{"index": 0, "finish_reason": "stop",
+                     "message": {"role": "assistant", "content": content}}],
+        "usage": {"prompt_tokens": 0, "completion_tokens": len(content) // 4, "total_tokens": len(content) // 4},
+    }
+
+
+async def _stream(model, content, completion_id, created):
+    def event(delta, finish_reason=None):
+        chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                 "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    yield event({"role": "assistant", "content": ""})
+    for start in range(0, len(content), CHUNK_CHARS):
+        yield event({"content": content[start:start + CHUNK_CHARS]})
+        await asyncio.sleep(0)
+    yield event({}, "stop")
+    yield "data: [DONE]\n\n"
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    payload = await request.json()
+    prompt = "\n".join(str(message.get("content", "")) for message in payload.get("messages", []))
+    rng = random.Random(prompt)
+    content = json.dumps(generate_papers(prompt, rng), ensure_ascii=False)
+    if LATENCY:
+        await asyncio.sleep(LATENCY)
+    model = payload.get("model", "fake")
+    completion_id, created = f"chatcmpl-{uuid.uuid4().hex}", int(time.time())
+    if payload.get("stream"):
+        return StreamingResponse(_stream(model, content, completion_id, created), media_type="text/event-stream")
+    return JSONResponse(_completion(model, content, completion_id, created))
+
+
+def main():
+    global LATENCY
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds before each response")
+    args = parser.parse_args()
+    LATENCY = args.latency
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
-"""Generate a basic PaperDetail React component that consumes papers.json."""
+"""Generate a basic PaperDetail React component that renders the paper passed in by DetailPage."""
 
 from __future__ import annotations
 
+import sys
 from pathlib import Path
 
-TEMPLATE = """import papers from '../data/papers.json'
-import './PaperDetail.css'
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
 
-export default function PaperDetail({ paperId }) {
-  const paper = papers.find((item) => item.id === paperId) || papers[0]
+from tools.file_manager import FileManager  # noqa: E402
 
+TEMPLATE = """import './PaperDetail.css'
+
+export default function PaperDetail({ paper }) {
   if (!paper) {
     return <div className="paper-detail">Paper not found.</div>
   }
@@ -97,12 +100,13 @@ CSS = """.paper-detail {
 
 
 def main() -> None:
-  component = Path("frontend/src/pages")
-  component.mkdir(parents=True, exist_ok=True)
-  (component / "PaperDetail.jsx").write_text(TEMPLATE, encoding="utf-8")
-  styles = Path("frontend/src/pages/PaperDetail.css")
-  styles.write_text(CSS, encoding="utf-8")
-  print("Generated PaperDetail component and styles.")
+  # Unchanged files keep their mtime, so the Vite watcher does not rebuild for nothing.
+  files = FileManager()
+  results = [
+      files.run("write", "frontend/src/pages/PaperDetail.jsx", TEMPLATE),
+      files.run("write", "frontend/src/pages/PaperDetail.css", CSS),
+  ]
+  print(f"Generated PaperDetail component and styles ({', '.join(results)}).")
 
 
 if __name__ == "__main__":
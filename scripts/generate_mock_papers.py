@@ -1,12 +1,28 @@
-"""Generate mock arXiv CS Daily data for frontend consumption."""
+"""Generate mock arXiv CS Daily data for frontend consumption.
+
+Mock papers are marked ``"mock": true`` and only written to papers.json and the static shards,
+next to the archived papers; they never enter the SQLite archive, so /papers, /search and the
+next export only ever serve real papers.
+"""
 
 from __future__ import annotations
 
 import json
+import sys
 from datetime import datetime, timedelta
 from pathlib import Path
 import random
 
+BASE_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BASE_DIR))
+
+from tools.file_manager import FileManager  # noqa: E402
+from tools.paper_shards import PaperShardPublisher  # noqa: E402
+from tools.paper_repository import PaperRepository  # noqa: E402
+
+PAPERS_DB = BASE_DIR / "state" / "papers.db"
+SHARDS_DIR = BASE_DIR / "frontend" / "public" / "data"
+
 # Categories for variety
 CATEGORIES = [
     ["cs.AI", "cs.LG"],
@@ -110,6 +126,7 @@ def generate_papers() -> list[dict]:
             "abstract": ABSTRACTS[i],
             "categories": CATEGORIES[i],
             "pdfUrl": f"https://arxiv.org/pdf/{paper_id}.pdf",
+            "mock": True,
         })
     
     return papers
@@ -121,8 +138,23 @@ def main() -> None:
     out_file = target / "papers.json"
     
     papers = generate_papers()
-    out_file.write_text(json.dumps(papers, indent=2, ensure_ascii=False), encoding="utf-8")
-    print(f"Generated {len(papers)} papers with 2025 dates to {out_file}")
+    # The archive is only read: the Vite build gets the archived papers plus the mock ones
+    archived = PaperRepository(PAPERS_DB).all_papers() if PAPERS_DB.exists() else []
+    archived_ids = {paper["id"] for paper in archived}
+    combined = archived + [paper for paper in papers if paper["id"] not in archived_ids]
+    combined.sort(key=lambda paper: (paper["submittedAt"], paper["id"]), reverse=True)
+    files = FileManager()
+    files.run("begin")
+    try:
+        written = files.run("write", str(out_file), json.dumps(combined, indent=2, ensure_ascii=False))
+        shards = PaperShardPublisher(SHARDS_DIR, files).publish(combined)
+        files.run("commit")
+    except Exception:
+        files.run("rollback")
+        raise
+    print(f"Generated {len(papers)} mock papers with 2025 dates to {out_file} "
+          f"next to {len(archived)} archived papers ({written})")
+    print(f"   Published {shards['days']} day and {shards['categories']} category shards to {SHARDS_DIR}")
     print(f"   Date range: {min(p['submittedAt'] for p in papers)} to {max(p['submittedAt'] for p in papers)}")
 
 
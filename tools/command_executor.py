@@ -2,35 +2,248 @@
 
 from __future__ import annotations
 
-import subprocess
-from typing import Dict, Sequence
+import asyncio
+import os
+import signal
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
 
 from loguru import logger
 
+from tools.resilience import Deadline, current_deadline
+
+try:  # POSIX only; cpu_time is reported as None elsewhere
+  import resource
+except ImportError:
+  resource = None
+
+READ_CHUNK = 64 * 1024
+KILL_GRACE_SECONDS = 5.0
+# How often a running command checks whether its task was cancelled.
+CANCEL_POLL_SECONDS = 0.25
+
+
+class OutputBuffer:
+  """Keeps the first and last lines of a stream and counts what was dropped in between."""
+
+  def __init__(self, head_lines: int = 200, tail_lines: int = 200, max_line_chars: int = 4000) -> None:
+    self.head_lines = head_lines
+    self.max_line_chars = max_line_chars
+    self.head: List[str] = []
+    self.tail: Deque[str] = deque(maxlen=tail_lines)
+    self.total = 0
+
+  def add(self, line: str) -> None:
+    if len(line) > self.max_line_chars:
+      line = line[:self.max_line_chars] + " …"
+    self.total += 1
+    if len(self.head) < self.head_lines:
+      self.head.append(line)
+    else:
+      self.tail.append(line)
+
+  @property
+  def omitted(self) -> int:
+    return self.total - len(self.head) - len(self.tail)
+
+  def text(self) -> str:
+    lines = list(self.head)
+    if self.omitted:
+      lines.append(f"... [{self.omitted} lines omitted] ...")
+    lines.extend(self.tail)
+    return "\n".join(lines)
+
 
 class CommandExecutor:
+  """Runs commands on a private asyncio loop, streaming their output line by line to the logger.
+
+  Only a bounded head/tail of stdout and stderr is kept, so memory stays flat however much a
+  build prints. On timeout the whole process group is terminated (then killed) and the result
+  is returned with ``timed_out`` set. The timeout is shortened to the calling task's deadline,
+  and a command whose task is cancelled is killed the same way (``cancelled`` is set too).
+  """
+
   name = "command_executor"
 
-  def __init__(self, cwd: str | None = None, timeout: int = 600) -> None:
+  def __init__(self, cwd: str | None = None, timeout: int = 600, head_lines: int = 200,
+               tail_lines: int = 200, max_concurrency: int = 4) -> None:
     self.cwd = cwd
     self.timeout = timeout
+    self.head_lines = head_lines
+    self.tail_lines = tail_lines
+    self.max_concurrency = max_concurrency
+    self._loop: Optional[asyncio.AbstractEventLoop] = None
+    self._loop_lock = threading.Lock()
+
+  def run(self, command: str | Sequence[str], timeout: Optional[float] = None,
+          on_line: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    """Run one command and wait for it; ``on_line(stream, line)`` sees every output line.
 
-  def run(self, command: str | Sequence[str]) -> Dict[str, str | int]:
-    logger.debug(f"Running command: {command}")
-    proc = subprocess.run(
-        command,
-        shell=isinstance(command, str),
-        cwd=self.cwd,
-        capture_output=True,
-        text=True,
-        timeout=self.timeout,
-        encoding="utf-8",
-        errors="ignore",
-    )
-    return {
+    Blocking on purpose: agents are synchronous and each task already has its own orchestrator
+    worker, so the caller's thread only waits while the subprocess and its output are handled on
+    the loop. The task deadline still kills the command; use ``arun`` from async code.
+    """
+    return self._submit(self.arun(command, timeout, on_line))
+
+  def run_many(self, commands: Sequence[str | Sequence[str]], timeout: Optional[float] = None,
+               concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run several commands at once (at most ``concurrency`` in flight); results keep input order."""
+    async def gather() -> List[Dict[str, Any]]:
+      semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+
+      async def one(command: str | Sequence[str]) -> Dict[str, Any]:
+        async with semaphore:
+          return await self.arun(command, timeout)
+
+      return await asyncio.gather(*(one(command) for command in commands))
+
+    return self._submit(gather())
+
+  async def arun(self, command: str | Sequence[str], timeout: Optional[float] = None,
+                 on_line: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
+    logger.debug("Running command: {}", command)
+    timeout = self.timeout if timeout is None else timeout
+    deadline = current_deadline()
+    if deadline is not None:
+      deadline.check(f"Command {command}")
+      timeout = deadline.cap(timeout)
+    # A new session makes the command the leader of its own process group, so a timeout can
+    # take down everything it spawned (npm -> node -> esbuild ...).
+    options: Dict[str, Any] = {"start_new_session": True} if os.name == "posix" else {}
+    cpu_before = self._children_cpu()
+    started = time.perf_counter()
+    if isinstance(command, str):
+      proc = await asyncio.create_subprocess_shell(
+          command, cwd=self.cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **options)
+    else:
+      proc = await asyncio.create_subprocess_exec(
+          *command, cwd=self.cwd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, **options)
+    label = f"[pid {proc.pid}]"
+    buffers = {
+        "stdout": OutputBuffer(self.head_lines, self.tail_lines),
+        "stderr": OutputBuffer(self.head_lines, self.tail_lines),
+    }
+    readers = [
+        asyncio.ensure_future(self._pump(proc.stdout, "stdout", buffers["stdout"], label, on_line)),
+        asyncio.ensure_future(self._pump(proc.stderr, "stderr", buffers["stderr"], label, on_line)),
+    ]
+    timed_out = False
+    try:
+      await self._wait(proc, timeout, deadline)
+    except asyncio.TimeoutError:
+      timed_out = True
+      if deadline is not None and deadline.cancelled:
+        logger.warning(f"Task cancelled ({deadline.reason}), killing process group: {command}")
+      else:
+        logger.warning(f"Command timed out after {timeout:.1f}s, killing process group: {command}")
+      await self._kill(proc)
+    await asyncio.gather(*readers)
+    wall_time = time.perf_counter() - started
+    cpu_after = self._children_cpu()
+    result = {
         "returncode": proc.returncode,
-        "stdout": proc.stdout,
-        "stderr": proc.stderr,
+        "stdout": buffers["stdout"].text(),
+        "stderr": buffers["stderr"].text(),
+        "stdout_lines": buffers["stdout"].total,
+        "stderr_lines": buffers["stderr"].total,
+        "timed_out": timed_out,
+        "cancelled": deadline is not None and deadline.cancelled,
+        "wall_time": round(wall_time, 3),
+        "cpu_time": round(cpu_after - cpu_before, 3) if cpu_before is not None else None,
     }
+    logger.debug(f"Command finished {label} code={proc.returncode} wall={result['wall_time']}s "
+                 f"cpu={result['cpu_time']}s")
+    return result
+
+  @staticmethod
+  async def _wait(proc: asyncio.subprocess.Process, timeout: Optional[float], deadline: Optional[Deadline]) -> None:
+    """``proc.wait()`` bounded by ``timeout``; also gives up early when ``deadline`` is cancelled."""
+    if deadline is None:
+      await asyncio.wait_for(proc.wait(), timeout)
+      return
+    ends = time.monotonic() + timeout if timeout is not None else None
+    waiter = asyncio.ensure_future(proc.wait())
+    while True:
+      step = CANCEL_POLL_SECONDS if ends is None else min(CANCEL_POLL_SECONDS, max(0.0, ends - time.monotonic()))
+      done, _ = await asyncio.wait({waiter}, timeout=step)
+      if done:
+        return
+      if deadline.cancelled or (ends is not None and time.monotonic() >= ends):
+        waiter.cancel()
+        raise asyncio.TimeoutError
+
+  async def _pump(self, stream: asyncio.StreamReader, stream_name: str, buffer: OutputBuffer,
+                  label: str, on_line: Optional[Callable[[str, str], None]]) -> None:
+    """Split a pipe into lines without ever holding more than one chunk plus one line."""
+    pending = ""
+    while True:
+      chunk = await stream.read(READ_CHUNK)
+      if not chunk:
+        break
+      pending += chunk.decode("utf-8", errors="ignore")
+      *lines, pending = pending.split("\n")
+      if len(pending) > buffer.max_line_chars:
+        lines.append(pending)
+        pending = ""
+      for line in lines:
+        self._emit(line.rstrip("\r"), stream_name, buffer, label, on_line)
+    if pending:
+      self._emit(pending.rstrip("\r"), stream_name, buffer, label, on_line)
+
+  @staticmethod
+  def _emit(line: str, stream_name: str, buffer: OutputBuffer, label: str,
+            on_line: Optional[Callable[[str, str], None]]) -> None:
+    buffer.add(line)
+    # Brace arguments: the line is only formatted when a sink accepts DEBUG records.
+    logger.debug("{} {}: {}", label, stream_name, line)
+    if on_line is not None:
+      on_line(stream_name, line)
+
+  @staticmethod
+  async def _kill(proc: asyncio.subprocess.Process) -> None:
+    if os.name != "posix":
+      proc.kill()
+      await proc.wait()
+      return
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+      try:
+        os.killpg(proc.pid, sig)
+      except ProcessLookupError:
+        break
+      try:
+        await asyncio.wait_for(proc.wait(), KILL_GRACE_SECONDS)
+      except asyncio.TimeoutError:
+        continue
+      # The leader is gone; make sure nothing it left behind keeps the pipes open.
+      try:
+        os.killpg(proc.pid, signal.SIGKILL)
+      except ProcessLookupError:
+        pass
+      break
+
+  @staticmethod
+  def _children_cpu() -> Optional[float]:
+    """User+system CPU of reaped children; overlapping commands share this counter."""
+    if resource is None:
+      return None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+  def _submit(self, coroutine: Any) -> Any:
+    return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
 
+  def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+    with self._loop_lock:
+      if self._loop is None:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="command-executor-loop", daemon=True).start()
+      return self._loop
 
+  def close(self) -> None:
+    """Stop the loop thread; running commands are not waited for."""
+    with self._loop_lock:
+      loop, self._loop = self._loop, None
+    if loop is not None:
+      loop.call_soon_threadsafe(loop.stop)
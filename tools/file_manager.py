@@ -2,8 +2,13 @@
 
 from __future__ import annotations
 
+import hashlib
+import os
+import stat
+import tempfile
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from loguru import logger
 
@@ -11,23 +16,131 @@ from loguru import logger
 class FileManager:
   name = "file_manager"
 
-  def __init__(self, root: Optional[Path] = None) -> None:
+  def __init__(self, root: Optional[Path] = None, fsync: bool = False) -> None:
     self.root = root or Path.cwd()
+    self.fsync = fsync
+    # Pending writes of an open batch, per thread so concurrent tasks do not share one.
+    self._local = threading.local()
+    self._hashes: Dict[Path, Tuple[int, int, str]] = {}
+    self._hash_lock = threading.Lock()
 
-  def run(self, operation: str, relative_path: str, content: str | None = None) -> str:
+  def run(self, operation: str, relative_path: str | None = None, content: str | None = None) -> str:
+    if operation == "begin":
+      self._local.batch = {}
+      return "batch-open"
+    if operation == "commit":
+      return self._commit()
+    if operation == "rollback":
+      staged = self._batch()
+      self._local.batch = None
+      return f"rolled-back {len(staged or {})}"
     target = self.root / relative_path
-    logger.debug(f"FileManager {operation} -> {target}")
+    logger.debug("FileManager {} -> {}", operation, target)
+    staged = self._batch()
     if operation == "read":
+      if staged is not None and target in staged:
+        return staged[target]
       return target.read_text(encoding="utf-8")
     if operation == "write":
-      target.parent.mkdir(parents=True, exist_ok=True)
-      target.write_text(content or "", encoding="utf-8")
-      return "written"
+      if staged is not None:
+        staged[target] = content or ""
+        return "staged"
+      return "written" if self._write(target, content or "") else "unchanged"
     if operation == "append":
+      if staged is not None:
+        base = staged.get(target)
+        if base is None:
+          base = target.read_text(encoding="utf-8") if target.exists() else ""
+        staged[target] = base + (content or "")
+        return "staged"
       target.parent.mkdir(parents=True, exist_ok=True)
       with target.open("a", encoding="utf-8") as fh:
         fh.write(content or "")
       return "appended"
     raise ValueError(f"Unsupported operation {operation}")
 
+  def _batch(self) -> Optional[Dict[Path, str]]:
+    return getattr(self._local, "batch", None)
+
+  def _commit(self) -> str:
+    staged = self._batch() or {}
+    self._local.batch = None
+    # Write every changed file to a temp sibling first, then rename them all back to back.
+    prepared: List[Tuple[Path, Path, str]] = []
+    try:
+      for target, text in staged.items():
+        data = text.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        if self._current_hash(target) == digest:
+          continue
+        prepared.append((self._write_temp(target, data), target, digest))
+    except BaseException:
+      for tmp, _, _ in prepared:
+        tmp.unlink(missing_ok=True)
+      raise
+    for tmp, target, digest in prepared:
+      os.replace(tmp, target)
+      self._remember(target, digest)
+    for directory in {target.parent for _, target, _ in prepared}:
+      self._sync_dir(directory)
+    unchanged = len(staged) - len(prepared)
+    logger.debug(f"FileManager commit: {len(prepared)} written, {unchanged} unchanged")
+    return f"committed {len(prepared)} written, {unchanged} unchanged"
+
+  def _write(self, target: Path, text: str) -> bool:
+    """Atomically replace ``target``; returns False without touching it when content is identical."""
+    data = text.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    if self._current_hash(target) == digest:
+      logger.debug("FileManager skip unchanged {}", target)
+      return False
+    os.replace(self._write_temp(target, data), target)
+    self._remember(target, digest)
+    self._sync_dir(target.parent)
+    return True
+
+  def _write_temp(self, target: Path, data: bytes) -> Path:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+      with os.fdopen(fd, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        if self.fsync:
+          os.fsync(fh.fileno())
+      # mkstemp creates 0600 files; keep the target's mode (or a regular 0644) after the rename.
+      mode = stat.S_IMODE(target.stat().st_mode) if target.exists() else 0o644
+      os.chmod(tmp_name, mode)
+    except BaseException:
+      Path(tmp_name).unlink(missing_ok=True)
+      raise
+    return Path(tmp_name)
+
+  def _sync_dir(self, directory: Path) -> None:
+    """Persist the rename itself (POSIX only) when fsync is requested."""
+    if not self.fsync or os.name != "posix":
+      return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+      os.fsync(fd)
+    finally:
+      os.close(fd)
+
+  def _current_hash(self, target: Path) -> Optional[str]:
+    try:
+      info = target.stat()
+    except FileNotFoundError:
+      return None
+    with self._hash_lock:
+      cached = self._hashes.get(target)
+    if cached and cached[:2] == (info.st_mtime_ns, info.st_size):
+      return cached[2]
+    digest = hashlib.sha256(target.read_bytes()).hexdigest()
+    with self._hash_lock:
+      self._hashes[target] = (info.st_mtime_ns, info.st_size, digest)
+    return digest
 
+  def _remember(self, target: Path, digest: str) -> None:
+    info = target.stat()
+    with self._hash_lock:
+      self._hashes[target] = (info.st_mtime_ns, info.st_size, digest)
@@ -0,0 +1,71 @@
+"""Incremental parser that yields elements of a streamed top-level JSON array."""
+
+from __future__ import annotations
+
+import json
+from typing import Any, List, Optional
+
+
+class JSONArrayStream:
+  """Feed text chunks; every completed object/array element of the outer array is returned.
+
+  Anything before the opening ``[`` (such as a markdown fence) is skipped, and consumed input
+  is discarded, so memory stays bounded by the largest single element.
+  """
+
+  def __init__(self) -> None:
+    self._buffer = ""
+    self._pos = 0
+    self._depth = 0
+    self._start: Optional[int] = None
+    self._in_string = False
+    self._escape = False
+    self.started = False
+    self.done = False
+    self.errors = 0
+
+  def feed(self, chunk: str) -> List[Any]:
+    if self.done or not chunk:
+      return []
+    buf = self._buffer + chunk
+    items: List[Any] = []
+    i = self._pos
+    while i < len(buf):
+      ch = buf[i]
+      i += 1
+      if not self.started:
+        if ch == "[":
+          self.started = True
+          self._depth = 1
+        continue
+      if self._in_string:
+        if self._escape:
+          self._escape = False
+        elif ch == "\\":
+          self._escape = True
+        elif ch == '"':
+          self._in_string = False
+      elif ch == '"':
+        self._in_string = True
+      elif ch in "{[":
+        if self._depth == 1:
+          self._start = i - 1
+        self._depth += 1
+      elif ch in "}]":
+        self._depth -= 1
+        if self._depth == 1 and self._start is not None:
+          try:
+            items.append(json.loads(buf[self._start:i]))
+          except json.JSONDecodeError:
+            self.errors += 1
+          self._start = None
+        elif self._depth == 0:
+          self.done = True
+          break
+    # Keep only the unfinished element (if any) for the next chunk.
+    cut = self._start if self._start is not None else i
+    self._buffer = buf[cut:]
+    self._pos = i - cut
+    if self._start is not None:
+      self._start = 0
+    return items
@@ -0,0 +1,160 @@
+"""Content-addressed cache for LLM completions (in-memory LRU + on-disk layer)."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from loguru import logger
+
+from tools.metrics import LLM_REQUESTS
+
+
+def request_key(request: Dict[str, Any]) -> str:
+  """Hash of the full request (model, temperature, messages, ...) used as cache key."""
+  payload = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+  return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def resolve_ttl(ttl: float | str | None) -> Optional[float]:
+  """Turn a per-call TTL (seconds, or "today" for end of local day) into seconds."""
+  if ttl is None:
+    return None
+  if ttl == "today":
+    now = datetime.now()
+    midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return (midnight - now).total_seconds()
+  return float(ttl)
+
+
+class LLMCache:
+  """Two-level cache: an LRU dict in front of one JSON file per entry on disk."""
+
+  def __init__(self, directory: Optional[Path] = None, max_memory_entries: int = 256,
+               max_disk_entries: int = 2048) -> None:
+    self.directory = Path(directory) if directory else None
+    self.max_memory_entries = max_memory_entries
+    self.max_disk_entries = max_disk_entries
+    self._memory: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+    self._lock = threading.Lock()
+    self._disk_count: Optional[int] = None
+    self.hits = 0
+    self.misses = 0
+    self.disk_hits = 0
+    self.expired = 0
+
+  def get(self, key: str) -> Optional[str]:
+    """Return the cached content or None; each lookup counts once in llm_requests_total
+    (source="cache") as a hit, a miss, or expired (found but past its TTL)."""
+    now = time.time()
+    stale = False
+    with self._lock:
+      entry = self._memory.get(key)
+      if entry is not None:
+        expires_at, content = entry
+        if expires_at > now:
+          self._memory.move_to_end(key)
+          self.hits += 1
+          LLM_REQUESTS.inc(source="cache", outcome="hit")
+          return content
+        del self._memory[key]
+        self.expired += 1
+        stale = True
+    entry = self._read_disk(key)
+    with self._lock:
+      if entry is not None and entry[0] > now:
+        self._remember(key, entry)
+        self.hits += 1
+        self.disk_hits += 1
+        LLM_REQUESTS.inc(source="cache", outcome="hit")
+        return entry[1]
+      if entry is not None:
+        if not stale:
+          self.expired += 1
+        stale = True
+        self._drop_disk(key)
+      self.misses += 1
+    LLM_REQUESTS.inc(source="cache", outcome="expired" if stale else "miss")
+    return None
+
+  def put(self, key: str, content: str, ttl: float) -> None:
+    if ttl <= 0:
+      return
+    entry = (time.time() + ttl, content)
+    with self._lock:
+      self._remember(key, entry)
+      self._write_disk(key, entry)
+
+  def stats(self) -> Dict[str, int]:
+    with self._lock:
+      return {
+          "hits": self.hits,
+          "misses": self.misses,
+          "disk_hits": self.disk_hits,
+          "expired": self.expired,
+          "memory_entries": len(self._memory),
+      }
+
+  def _remember(self, key: str, entry: Tuple[float, str]) -> None:
+    self._memory[key] = entry
+    self._memory.move_to_end(key)
+    while len(self._memory) > self.max_memory_entries:
+      self._memory.popitem(last=False)
+
+  def _path(self, key: str) -> Path:
+    return self.directory / key[:2] / f"{key}.json"
+
+  def _read_disk(self, key: str) -> Optional[Tuple[float, str]]:
+    if self.directory is None:
+      return None
+    path = self._path(key)
+    try:
+      payload = json.loads(path.read_text(encoding="utf-8"))
+      return float(payload["expires_at"]), payload["content"]
+    except FileNotFoundError:
+      return None
+    except (OSError, ValueError, KeyError) as exc:
+      logger.warning(f"Discarding unreadable LLM cache entry {path}: {exc}")
+      return None
+
+  def _write_disk(self, key: str, entry: Tuple[float, str]) -> None:
+    if self.directory is None:
+      return
+    path = self._path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    existed = path.exists()
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps({"expires_at": entry[0], "content": entry[1]}, ensure_ascii=False),
+                   encoding="utf-8")
+    os.replace(tmp, path)
+    if self._disk_count is None:
+      self._disk_count = sum(1 for _ in self.directory.glob("*/*.json"))
+    elif not existed:
+      self._disk_count += 1
+    if self._disk_count > self.max_disk_entries:
+      self._evict_disk()
+
+  def _drop_disk(self, key: str) -> None:
+    if self.directory is None:
+      return
+    try:
+      self._path(key).unlink()
+      if self._disk_count is not None:
+        self._disk_count -= 1
+    except FileNotFoundError:
+      pass
+
+  def _evict_disk(self) -> None:
+    """Remove the oldest on-disk entries, leaving headroom so eviction does not run on every put."""
+    files = sorted(self.directory.glob("*/*.json"), key=lambda item: item.stat().st_mtime)
+    keep = int(self.max_disk_entries * 0.9)
+    for path in files[:max(len(files) - keep, 0)]:
+      path.unlink(missing_ok=True)
+    self._disk_count = min(len(files), keep)
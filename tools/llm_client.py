@@ -2,46 +2,327 @@
 
 from __future__ import annotations
 
+import asyncio
 import os
+import threading
 from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
 
+import httpx
 from dotenv import load_dotenv
 from loguru import logger
-from openai import OpenAI
+from openai import APIConnectionError, AsyncOpenAI, OpenAI
+
+from tools.llm_cache import LLMCache, request_key, resolve_ttl
+from tools.llm_transport import DEFAULT_LOCAL_URL, build_transport, transport_mode
+from tools.metrics import LLM_PROMPT_CHARS, LLM_REQUESTS, LLM_RESPONSE_CHARS
+from tools.resilience import (OPEN, Cancelled, CircuitOpenError, Deadline, DeadlineExceeded, RetryPolicy,
+                              current_deadline, get_breaker)
 
 ENV_PATH = Path(__file__).resolve().parents[1] / ".env"
 if ENV_PATH.exists():
   load_dotenv(ENV_PATH)
+DEFAULT_CASSETTE = Path(__file__).resolve().parents[1] / "state" / "llm_cassette.jsonl"
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def is_retryable(error: BaseException) -> bool:
+  """Connection problems, timeouts, rate limits and 5xx responses; not malformed or unauthorized requests."""
+  if isinstance(error, (APIConnectionError, httpx.TransportError, TimeoutError)):
+    return True
+  status = getattr(error, "status_code", None)
+  return status is not None and (status in RETRYABLE_STATUS or status >= 500)
+
+
+def _retry_after(error: BaseException) -> float:
+  response = getattr(error, "response", None)
+  try:
+    return float(response.headers.get("retry-after", 0)) if response is not None else 0.0
+  except (TypeError, ValueError):
+    return 0.0
 
 
 class LLMClient:
   name = "llm_client"
 
-  def __init__(self) -> None:
+  def __init__(self, cache: Optional[LLMCache] = None, max_concurrency: Optional[int] = None,
+               mode: Optional[str] = None) -> None:
+    # live | record | replay | local (LLM_TRANSPORT); only live and record need a real key.
+    self.mode = mode or transport_mode()
     api_key = os.getenv("OPENAI_API_KEY")
     base_url = os.getenv("OPENAI_BASE_URL", "https://api.openai.com/v1")
+    if self.mode == "local":
+      base_url = os.getenv("LLM_LOCAL_URL", DEFAULT_LOCAL_URL)
+    if self.mode in ("replay", "local"):
+      api_key = api_key or self.mode
     if not api_key:
       raise RuntimeError("OPENAI_API_KEY not set in .env")
     self.model = os.getenv("OPENAI_MODEL", "gpt-4o-mini").strip()
-    self.client = OpenAI(api_key=api_key, base_url=base_url)
-    logger.info(f"LLMClient initialized with model: {self.model}, base_url: {base_url}")
+    self.base_url = base_url
+    self.cache = cache
+    self.max_concurrency = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    self._limits = httpx.Limits(max_connections=self.max_concurrency * 2,
+                                max_keepalive_connections=self.max_concurrency)
+    self._transport = build_transport(self.mode, Path(os.getenv("LLM_CASSETTE", str(DEFAULT_CASSETTE))),
+                                      self._limits)
+    # Seconds per attempt, and for one call including its retries. The OpenAI client's own retries
+    # are disabled so that only this policy (and the circuit breaker) applies.
+    self.timeout = float(os.getenv("LLM_TIMEOUT", "60"))
+    self.deadline = float(os.getenv("LLM_DEADLINE", "180"))
+    self.retry = RetryPolicy(attempts=int(os.getenv("LLM_RETRIES", "3")),
+                             base_delay=float(os.getenv("LLM_BACKOFF_BASE", "0.5")),
+                             max_delay=float(os.getenv("LLM_BACKOFF_MAX", "8")))
+    self.breaker = get_breaker("llm", failure_threshold=int(os.getenv("LLM_BREAKER_THRESHOLD", "5")),
+                               reset_timeout=float(os.getenv("LLM_BREAKER_RESET", "30")))
+    http_client = httpx.Client(transport=self._transport) if self._transport is not None else None
+    self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=http_client,
+                         timeout=self.timeout, max_retries=0)
+    self._api_key = api_key
+    # Async mode: one pooled AsyncOpenAI client living on a private event loop thread,
+    # so keep-alive connections survive across sharded batches.
+    self._loop: Optional[asyncio.AbstractEventLoop] = None
+    self._async_client: Optional[AsyncOpenAI] = None
+    self._loop_lock = threading.Lock()
+    logger.info(f"LLMClient initialized with model: {self.model}, base_url: {base_url}, transport: {self.mode}")
+
+  def _request(self, prompt: str) -> Dict[str, Any]:
+    return {
+        "model": self.model,
+        "temperature": 0.2,
+        "messages": [
+            {"role": "system", "content": "You output valid JSON arrays of arXiv CS paper metadata."},
+            {"role": "user", "content": prompt},
+        ],
+    }
+
+  def _lookup(self, prompt: str, cache_ttl: float | str | None) -> Tuple[Dict[str, Any], Optional[str],
+                                                                          Optional[float], Optional[str]]:
+    request = self._request(prompt)
+    ttl = resolve_ttl(cache_ttl) if self.cache is not None else None
+    key = request_key({"base_url": self.base_url, **request}) if ttl else None
+    cached = self.cache.get(key) if key is not None else None
+    if cached is not None:
+      logger.info(f"♻️ LLM cache hit ({len(cached)} chars), skipping network call")
+    else:
+      LLM_PROMPT_CHARS.inc(len(prompt))
+    return request, key, ttl, cached
+
+  @staticmethod
+  def _record(outcome: str, content: str = "") -> None:
+    LLM_REQUESTS.inc(source="api", outcome=outcome)
+    LLM_RESPONSE_CHARS.inc(len(content))
 
-  def run(self, prompt: str) -> str:
+  def _store(self, key: Optional[str], content: str, ttl: Optional[float],
+             validate: Optional[Callable[[str], bool]] = None) -> None:
+    if key is None:
+      return
+    if validate is not None and not validate(content):
+      # Caching it would serve the same bad response to every retry until the TTL runs out.
+      logger.warning("LLM response rejected by the caller; not caching it")
+      return
+    self.cache.put(key, content, ttl)
+
+  def run(self, prompt: str | Sequence[str], cache_ttl: float | str | None = None,
+          concurrency: Optional[int] = None, on_chunk: Optional[Callable[..., None]] = None,
+          validate: Optional[Callable[..., bool]] = None) -> str | List[Optional[str]]:
+    """Complete ``prompt``; pass ``cache_ttl`` (seconds or "today") to serve repeats from the cache.
+
+    A sequence of prompts is treated as shards of one request and completed concurrently in
+    async mode; the result is a list aligned with the prompts, with ``None`` for failed shards.
+    With ``on_chunk`` the completion is streamed and each text delta is passed to the callback
+    as it arrives (``on_chunk(delta)``, or ``on_chunk(shard_index, delta)`` for shards).
+    With ``validate`` a completion is only cached if ``validate(content)`` (``validate(shard_index,
+    content)`` for shards) returns True, so a malformed response is not served again.
+    """
+    if not isinstance(prompt, str):
+      return self._run_sharded(list(prompt), cache_ttl, concurrency or self.max_concurrency, on_chunk, validate)
+    request, key, ttl, cached = self._lookup(prompt, cache_ttl)
+    if cached is not None:
+      if on_chunk is not None:
+        on_chunk(cached)
+      return cached
     logger.info(f"🤖 Calling LLM ({self.model}) with prompt length: {len(prompt)} chars")
     try:
-      response = self.client.chat.completions.create(
-          model=self.model,
-          temperature=0.2,
-          messages=[
-              {"role": "system", "content": "You output valid JSON arrays of arXiv CS paper metadata."},
-              {"role": "user", "content": prompt},
-          ],
-      )
-      content = response.choices[0].message.content
+      content = self._complete(request, on_chunk)
       logger.info(f"✅ LLM call successful. Response length: {len(content)} chars")
+      self._record("ok", content)
+      self._store(key, content, ttl, validate)
       return content
     except Exception as e:
       logger.error(f"❌ LLM call failed: {type(e).__name__}: {e}")
+      self._record("circuit_open" if isinstance(e, CircuitOpenError) else "error")
       raise
 
+  def _complete(self, request: Dict[str, Any], on_chunk: Optional[Callable[[str], None]]) -> str:
+    # Nested in the calling task's deadline, if any, so a task budget or cancellation also applies.
+    deadline = Deadline(self.deadline, parent=current_deadline())
+    attempt = 0
+    while True:
+      self.breaker.before_call()
+      streamed = [False]
+      try:
+        deadline.check("LLM call")
+        content = self._attempt(request, on_chunk, deadline, streamed)
+      except Exception as e:
+        delay = self._retry_delay(e, attempt, deadline, streamed[0])
+        if delay is None:
+          raise
+        deadline.wait(delay)
+        attempt += 1
+        continue
+      self.breaker.record_success()
+      return content
+
+  def _attempt(self, request: Dict[str, Any], on_chunk: Optional[Callable[[str], None]], deadline: Deadline,
+               streamed: List[bool]) -> str:
+    timeout = deadline.cap(self.timeout)
+    if on_chunk is None:
+      response = self.client.chat.completions.create(**request, timeout=timeout)
+      return response.choices[0].message.content
+    parts = []
+    stream = self.client.chat.completions.create(**request, stream=True, timeout=timeout)
+    try:
+      for chunk in stream:
+        # The HTTP read timeout only bounds the gap between chunks, so check the whole call too.
+        deadline.check("LLM stream")
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+          parts.append(delta)
+          streamed[0] = True
+          on_chunk(delta)
+    finally:
+      stream.close()
+    return "".join(parts)
+
+  def _retry_delay(self, error: BaseException, attempt: int, deadline: Deadline, streamed: bool) -> Optional[float]:
+    """Backoff before the next attempt, or None when ``error`` should be raised.
+
+    Only endpoint failures count towards the circuit breaker, not attempts cut short by the
+    caller's deadline or cancellation. A stream that already delivered text is not retried,
+    since the caller has consumed part of it.
+    """
+    if isinstance(error, (DeadlineExceeded, Cancelled)) or deadline.expired() or not is_retryable(error):
+      self.breaker.release()
+      return None
+    self.breaker.record_failure(error)
+    if streamed or attempt + 1 >= self.retry.attempts or self.breaker.state == OPEN:
+      return None
+    delay = max(self.retry.delay(attempt), _retry_after(error))
+    remaining = deadline.remaining()
+    if remaining is not None and delay >= remaining:
+      return None
+    logger.warning(f"LLM attempt {attempt + 1}/{self.retry.attempts} failed ({type(error).__name__}: {error}); "
+                   f"retrying in {delay:.2f}s")
+    LLM_REQUESTS.inc(source="api", outcome="retry")
+    return delay
+
+  async def arun(self, prompt: str, cache_ttl: float | str | None = None,
+                 on_chunk: Optional[Callable[[str], None]] = None,
+                 validate: Optional[Callable[[str], bool]] = None) -> str:
+    """Async counterpart of ``run`` for a single prompt, using the pooled async client."""
+    request, key, ttl, cached = self._lookup(prompt, cache_ttl)
+    if cached is not None:
+      if on_chunk is not None:
+        on_chunk(cached)
+      return cached
+    logger.info(f"🤖 Calling LLM async ({self.model}) with prompt length: {len(prompt)} chars")
+    try:
+      content = await self._acomplete(request, on_chunk)
+      logger.info(f"✅ Async LLM call successful. Response length: {len(content)} chars")
+      self._record("ok", content)
+      self._store(key, content, ttl, validate)
+      return content
+    except Exception as e:
+      logger.error(f"❌ Async LLM call failed: {type(e).__name__}: {e}")
+      self._record("circuit_open" if isinstance(e, CircuitOpenError) else "error")
+      raise
+
+  async def _acomplete(self, request: Dict[str, Any], on_chunk: Optional[Callable[[str], None]]) -> str:
+    deadline = Deadline(self.deadline, parent=current_deadline())
+    attempt = 0
+    while True:
+      self.breaker.before_call()
+      streamed = [False]
+      try:
+        deadline.check("LLM call")
+        timeout = deadline.cap(self.timeout)
+        try:
+          # wait_for bounds the whole attempt, streamed or not.
+          content = await asyncio.wait_for(self._aattempt(request, on_chunk, deadline, streamed), timeout)
+        except asyncio.TimeoutError:
+          raise TimeoutError(f"LLM attempt timed out after {timeout:.1f}s") from None
+      except Exception as e:
+        delay = self._retry_delay(e, attempt, deadline, streamed[0])
+        if delay is None:
+          raise
+        await asyncio.sleep(delay)
+        attempt += 1
+        continue
+      self.breaker.record_success()
+      return content
+
+  async def _aattempt(self, request: Dict[str, Any], on_chunk: Optional[Callable[[str], None]],
+                      deadline: Deadline, streamed: List[bool]) -> str:
+    client = self._ensure_async_client()
+    if on_chunk is None:
+      response = await client.chat.completions.create(**request)
+      return response.choices[0].message.content
+    parts = []
+    async for chunk in await client.chat.completions.create(**request, stream=True):
+      # wait_for bounds the time; cancellation is only noticed between chunks.
+      deadline.check("LLM stream")
+      delta = chunk.choices[0].delta.content if chunk.choices else None
+      if delta:
+        parts.append(delta)
+        streamed[0] = True
+        on_chunk(delta)
+    return "".join(parts)
+
+  def _run_sharded(self, prompts: List[str], cache_ttl: float | str | None, concurrency: int,
+                   on_chunk: Optional[Callable[[int, str], None]] = None,
+                   validate: Optional[Callable[[int, str], bool]] = None) -> List[Optional[str]]:
+    async def gather() -> List[Any]:
+      semaphore = asyncio.Semaphore(concurrency)
+
+      async def shard(index: int, prompt: str) -> str:
+        callback = (lambda delta: on_chunk(index, delta)) if on_chunk is not None else None
+        check = (lambda content: validate(index, content)) if validate is not None else None
+        async with semaphore:
+          return await self.arun(prompt, cache_ttl, callback, check)
+
+      return await asyncio.gather(*(shard(index, prompt) for index, prompt in enumerate(prompts)),
+                                  return_exceptions=True)
+
+    logger.info(f"🤖 Dispatching {len(prompts)} LLM shards (concurrency={concurrency})")
+    results = asyncio.run_coroutine_threadsafe(gather(), self._ensure_loop()).result()
+    failures = [result for result in results if isinstance(result, BaseException)]
+    if failures and len(failures) == len(results):
+      raise failures[0]
+    if failures:
+      logger.warning(f"{len(failures)}/{len(results)} LLM shards failed; keeping the rest")
+    return [None if isinstance(result, BaseException) else result for result in results]
+
+  def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+    with self._loop_lock:
+      if self._loop is None:
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name="llm-client-loop", daemon=True).start()
+      return self._loop
+
+  def _ensure_async_client(self) -> AsyncOpenAI:
+    with self._loop_lock:
+      if self._async_client is None:
+        self._async_client = AsyncOpenAI(
+            api_key=self._api_key, base_url=self.base_url, timeout=self.timeout, max_retries=0,
+            http_client=httpx.AsyncClient(limits=self._limits, transport=self._transport))
+      return self._async_client
 
+  def close(self) -> None:
+    """Release pooled connections and stop the async loop thread."""
+    loop, client = self._loop, self._async_client
+    if loop is not None:
+      if client is not None:
+        asyncio.run_coroutine_threadsafe(client.close(), loop).result()
+      loop.call_soon_threadsafe(loop.stop)
+    self._loop = self._async_client = None
+    self.client.close()
@@ -0,0 +1,215 @@
+"""Record/replay HTTP transports for the OpenAI client, for offline and repeatable pipeline runs."""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+from loguru import logger
+
+MODES = ("live", "record", "replay", "local")
+DEFAULT_LOCAL_URL = "http://127.0.0.1:8001/v1"
+
+
+def request_fingerprint(request: httpx.Request) -> str:
+  """Hash of method, path and JSON body (key order ignored), shared by recording and replay."""
+  body = request.content
+  try:
+    body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode("utf-8")
+  except ValueError:
+    pass
+  digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode("utf-8") + body)
+  return digest.hexdigest()
+
+
+def _shape(request: httpx.Request) -> str:
+  """Coarse request class (endpoint + streaming flag) used when no exact recording exists."""
+  try:
+    stream = bool(json.loads(request.content).get("stream"))
+  except (ValueError, AttributeError):
+    stream = False
+  return f"{request.method} {request.url.path} stream={stream}"
+
+
+class Cassette:
+  """JSON-lines file of recorded request/response pairs."""
+
+  def __init__(self, path: Path) -> None:
+    self.path = Path(path)
+    self._lock = threading.Lock()
+    self._by_key: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    self._by_shape: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    self._cursor: Dict[str, int] = defaultdict(int)
+    if self.path.exists():
+      for line in self.path.read_text(encoding="utf-8").splitlines():
+        try:
+          entry = json.loads(line)
+        except ValueError:
+          continue
+        self._index(entry)
+
+  def __len__(self) -> int:
+    return sum(len(entries) for entries in self._by_key.values())
+
+  def _index(self, entry: Dict[str, Any]) -> None:
+    self._by_key[entry["key"]].append(entry)
+    self._by_shape[entry["shape"]].append(entry)
+
+  def add(self, request: httpx.Request, response: httpx.Response, body: bytes, elapsed: float) -> None:
+    entry = {
+        "key": request_fingerprint(request),
+        "shape": _shape(request),
+        "request": request.content.decode("utf-8", errors="replace"),
+        "status": response.status_code,
+        "content_type": response.headers.get("content-type", "application/json"),
+        "body": body.decode("utf-8", errors="replace"),
+        "elapsed": round(elapsed, 4),
+    }
+    with self._lock:
+      self.path.parent.mkdir(parents=True, exist_ok=True)
+      with self.path.open("a", encoding="utf-8") as fh:
+        fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+      self._index(entry)
+
+  def find(self, request: httpx.Request) -> Optional[Dict[str, Any]]:
+    """Exact match first; otherwise the next recording of the same shape, round robin.
+
+    The fallback keeps dated prompts replayable on later days.
+    """
+    with self._lock:
+      for index, pool in ((request_fingerprint(request), self._by_key), (_shape(request), self._by_shape)):
+        entries = pool.get(index)
+        if entries:
+          entry = entries[self._cursor[index] % len(entries)]
+          self._cursor[index] += 1
+          return entry
+    return None
+
+
+class LatencyModel:
+  """Simulated response latency: none, recorded, fixed:S, uniform:A,B or lognormal:MEDIAN,SIGMA."""
+
+  def __init__(self, spec: str = "none", seed: Optional[int] = None) -> None:
+    self.spec = spec or "none"
+    kind, _, args = self.spec.partition(":")
+    self.kind = kind
+    self.args = [float(value) for value in args.split(",") if value]
+    if kind not in ("none", "recorded", "fixed", "uniform", "lognormal"):
+      raise ValueError(f"Unknown latency model {spec}")
+    self._rng = random.Random(seed)
+    self._lock = threading.Lock()
+
+  def sample(self, recorded: float = 0.0) -> float:
+    with self._lock:
+      if self.kind == "recorded":
+        return recorded
+      if self.kind == "fixed":
+        return self.args[0]
+      if self.kind == "uniform":
+        return self._rng.uniform(self.args[0], self.args[1])
+      if self.kind == "lognormal":
+        return self._rng.lognormvariate(math.log(self.args[0]), self.args[1])
+    return 0.0
+
+
+class ReplayTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+  """Serves responses from a cassette; unknown requests get a 404 so the caller's fallback runs."""
+
+  def __init__(self, cassette: Cassette, latency: Optional[LatencyModel] = None) -> None:
+    self.cassette = cassette
+    self.latency = latency or LatencyModel()
+
+  def _respond(self, request: httpx.Request) -> Tuple[httpx.Response, float]:
+    entry = self.cassette.find(request)
+    if entry is None:
+      logger.warning(f"No recording for {_shape(request)} in {self.cassette.path}")
+      body = {"error": {"message": f"request not found in cassette {self.cassette.path}", "type": "replay_miss"}}
+      return httpx.Response(404, json=body), 0.0
+    response = httpx.Response(entry["status"], headers={"content-type": entry["content_type"]},
+                              content=entry["body"].encode("utf-8"))
+    return response, self.latency.sample(entry.get("elapsed", 0.0))
+
+  def handle_request(self, request: httpx.Request) -> httpx.Response:
+    response, delay = self._respond(request)
+    if delay:
+      time.sleep(delay)
+    return response
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    response, delay = self._respond(request)
+    if delay:
+      await asyncio.sleep(delay)
+    return response
+
+
+class RecordTransport(httpx.BaseTransport, httpx.AsyncBaseTransport):
+  """Forwards to the real endpoint and appends every exchange to the cassette.
+
+  Responses are read in full before being handed back, so streamed completions arrive in one
+  piece while recording.
+  """
+
+  def __init__(self, cassette: Cassette, limits: Optional[httpx.Limits] = None) -> None:
+    self.cassette = cassette
+    self._sync = httpx.HTTPTransport()
+    self._async = httpx.AsyncHTTPTransport(limits=limits or httpx.Limits())
+
+  def _replayable(self, request: httpx.Request, response: httpx.Response, elapsed: float) -> httpx.Response:
+    # ``content`` is already decoded, so the original content-encoding headers no longer apply.
+    self.cassette.add(request, response, response.content, elapsed)
+    content_type = response.headers.get("content-type", "application/json")
+    return httpx.Response(response.status_code, headers={"content-type": content_type}, content=response.content)
+
+  def handle_request(self, request: httpx.Request) -> httpx.Response:
+    started = time.perf_counter()
+    response = self._sync.handle_request(request)
+    try:
+      response.read()
+    finally:
+      response.close()
+    return self._replayable(request, response, time.perf_counter() - started)
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    started = time.perf_counter()
+    response = await self._async.handle_async_request(request)
+    try:
+      await response.aread()
+    finally:
+      await response.aclose()
+    return self._replayable(request, response, time.perf_counter() - started)
+
+  def close(self) -> None:
+    self._sync.close()
+
+  async def aclose(self) -> None:
+    await self._async.aclose()
+
+
+def transport_mode() -> str:
+  mode = os.getenv("LLM_TRANSPORT", "live").strip().lower()
+  if mode not in MODES:
+    raise ValueError(f"LLM_TRANSPORT must be one of {', '.join(MODES)}, got {mode}")
+  return mode
+
+
+def build_transport(mode: str, cassette_path: Path, limits: httpx.Limits) -> Optional[Any]:
+  """Transport shared by the sync and async OpenAI clients, or None for the default network stack."""
+  if mode == "record":
+    return RecordTransport(Cassette(cassette_path), limits)
+  if mode == "replay":
+    cassette = Cassette(cassette_path)
+    seed = os.getenv("LLM_REPLAY_SEED")
+    latency = LatencyModel(os.getenv("LLM_REPLAY_LATENCY", "none"), int(seed) if seed else None)
+    logger.info(f"Replaying {len(cassette)} recorded LLM responses from {cassette_path} (latency={latency.spec})")
+    return ReplayTransport(cassette, latency)
+  return None
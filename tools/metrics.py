@@ -0,0 +1,179 @@
+"""In-process counters and histograms rendered in the Prometheus text exposition format."""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets (seconds) wide enough for both a dict lookup and a ten-minute npm build.
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0,
+)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+  return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+  pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+  if extra:
+    pairs.append(extra)
+  return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+  if value == math.inf:
+    return "+Inf"
+  return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+  kind = ""
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+    self.name = name
+    self.documentation = documentation
+    self.labelnames = tuple(labelnames)
+    self._lock = threading.Lock()
+
+  def _key(self, labels: Dict[str, str]) -> LabelKey:
+    return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+  def render(self) -> List[str]:
+    return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+  kind = "counter"
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+    super().__init__(name, documentation, labelnames)
+    self._values: Dict[LabelKey, float] = {}
+
+  def inc(self, amount: float = 1.0, **labels: str) -> None:
+    key = self._key(labels)
+    with self._lock:
+      self._values[key] = self._values.get(key, 0.0) + amount
+
+  def value(self, **labels: str) -> float:
+    with self._lock:
+      return self._values.get(self._key(labels), 0.0)
+
+  def render(self) -> List[str]:
+    with self._lock:
+      values = sorted(self._values.items())
+    lines = super().render()
+    for key, value in values:
+      lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+    return lines
+
+
+class Histogram(_Metric):
+  """Observations only bump one bucket slot; cumulative counts are built when scraped."""
+
+  kind = "histogram"
+
+  def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+               buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+    super().__init__(name, documentation, labelnames)
+    self.buckets = tuple(sorted(buckets))
+    # Per label set: [count per bucket ..., count above the last bucket], sum.
+    self._series: Dict[LabelKey, Tuple[List[int], List[float]]] = {}
+
+  def observe(self, value: float, **labels: str) -> None:
+    key = self._key(labels)
+    slot = bisect_left(self.buckets, value)
+    with self._lock:
+      series = self._series.get(key)
+      if series is None:
+        series = self._series[key] = ([0] * (len(self.buckets) + 1), [0.0])
+      series[0][slot] += 1
+      series[1][0] += value
+
+  @contextmanager
+  def time(self, **labels: str) -> Iterator[Dict[str, str]]:
+    """Observe the duration of the block; the yielded dict may be updated with late labels."""
+    labels = dict(labels)
+    started = time.perf_counter()
+    try:
+      yield labels
+    finally:
+      self.observe(time.perf_counter() - started, **labels)
+
+  def count(self, **labels: str) -> int:
+    with self._lock:
+      series = self._series.get(self._key(labels))
+      return sum(series[0]) if series else 0
+
+  def render(self) -> List[str]:
+    with self._lock:
+      snapshot = sorted((key, list(counts), total[0]) for key, (counts, total) in self._series.items())
+    lines = super().render()
+    for key, counts, total in snapshot:
+      cumulative = 0
+      for bound, count in zip(self.buckets + (math.inf,), counts):
+        cumulative += count
+        le = f'le="{_format_value(bound)}"'
+        lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+      labels = _format_labels(self.labelnames, key)
+      lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+      lines.append(f"{self.name}_count{labels} {cumulative}")
+    return lines
+
+
+class Registry:
+  def __init__(self) -> None:
+    self._metrics: Dict[str, _Metric] = {}
+    self._lock = threading.Lock()
+
+  def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return self._get_or_create(Counter, name, documentation, labelnames)
+
+  def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                buckets: Optional[Sequence[float]] = None) -> Histogram:
+    if buckets is None:
+      return self._get_or_create(Histogram, name, documentation, labelnames)
+    return self._get_or_create(Histogram, name, documentation, labelnames, buckets)
+
+  def _get_or_create(self, cls, name: str, *args):
+    with self._lock:
+      metric = self._metrics.get(name)
+      if metric is None:
+        metric = self._metrics[name] = cls(name, *args)
+      elif not isinstance(metric, cls):
+        raise ValueError(f"Metric {name} already registered as {metric.kind}")
+      return metric
+
+  def render(self) -> str:
+    with self._lock:
+      metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+    lines: List[str] = []
+    for metric in metrics:
+      lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+TOOL_DURATION = REGISTRY.histogram(
+    "agent_tool_duration_seconds", "Duration of BaseAgent.dispatch_tool calls.", ("agent", "tool", "outcome"))
+TASK_DURATION = REGISTRY.histogram(
+    "orchestrator_task_duration_seconds", "Duration of orchestrator tasks.", ("task_id", "owner", "status"))
+LLM_REQUESTS = REGISTRY.counter(
+    "llm_requests_total", "LLM completions by source and outcome (api: ok/error/retry; cache: hit/miss/expired).", ("source", "outcome"))
+LLM_PROMPT_CHARS = REGISTRY.counter("llm_prompt_chars_total", "Characters sent to the LLM API.")
+LLM_RESPONSE_CHARS = REGISTRY.counter("llm_response_chars_total", "Characters received from the LLM API.")
+FALLBACKS = REGISTRY.counter(
+    "codegen_fallback_total", "LLM generations that fell back to a script.", ("path",))
+BREAKER_TRANSITIONS = REGISTRY.counter(
+    "circuit_breaker_transitions_total", "Circuit breaker state changes by breaker and new state.",
+    ("breaker", "state"))
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "log_records_dropped_total", "DEBUG log records dropped by the per-call-site rate limit.", ("module",))
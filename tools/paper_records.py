@@ -0,0 +1,93 @@
+"""Validation and de-duplication of generated paper records."""
+
+from __future__ import annotations
+
+import re
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from tools.near_duplicates import NearDuplicateIndex
+
+DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# arXiv category ids (cs.AI, stat.ML, quant-ph); they become shard file names, so nothing else is accepted.
+CATEGORY_PATTERN = re.compile(r"^[a-z-]+(\.[A-Za-z-]+)?$")
+
+
+def valid_category(category: Any) -> bool:
+  return isinstance(category, str) and CATEGORY_PATTERN.fullmatch(category) is not None
+
+
+def normalize_title(title: str) -> str:
+  return " ".join(str(title).lower().split())
+
+
+def validate_paper(item: Any) -> Optional[Dict[str, Any]]:
+  """Return a cleaned paper dict, or None when the record cannot be used by the frontend."""
+  if not isinstance(item, dict):
+    return None
+  paper_id, title = item.get("id"), item.get("title")
+  if not isinstance(paper_id, str) or not paper_id.strip() or not isinstance(title, str) or not title.strip():
+    return None
+  if not isinstance(item.get("submittedAt"), str) or not DATE_PATTERN.fullmatch(item["submittedAt"]):
+    return None
+  authors, categories = item.get("authors"), item.get("categories")
+  if not isinstance(authors, list) or not authors or not isinstance(categories, list):
+    return None
+  categories = [category.strip() for category in categories if isinstance(category, str)]
+  categories = list(dict.fromkeys(category for category in categories if valid_category(category)))
+  if not categories:
+    return None
+  paper_id = paper_id.strip()
+  return {
+      "id": paper_id,
+      "title": title.strip(),
+      "authors": [str(author) for author in authors],
+      "submittedAt": item["submittedAt"],
+      "abstract": str(item.get("abstract", "")),
+      "categories": categories,
+      "pdfUrl": item.get("pdfUrl") or f"https://arxiv.org/pdf/{paper_id}.pdf",
+  }
+
+
+class PaperCollector:
+  """Accepts papers as they arrive, keeping the first record per id and per title.
+
+  Papers whose title + abstract is a near duplicate (MinHash/LSH) of an earlier paper in the
+  batch, or of a different paper in ``corpus``, are dropped as well.
+  """
+
+  def __init__(self, corpus: Optional[NearDuplicateIndex] = None) -> None:
+    self.papers: List[Dict[str, Any]] = []
+    self._ids = set()
+    self._titles = set()
+    self.corpus = corpus
+    self._batch = NearDuplicateIndex(corpus.hasher if corpus is not None else None)
+    self.invalid = 0
+    self.duplicates = 0
+    self.near_duplicates = 0
+
+  def add(self, item: Any) -> bool:
+    paper = validate_paper(item)
+    if paper is None:
+      self.invalid += 1
+      return False
+    title_key = normalize_title(paper["title"])
+    if paper["id"] in self._ids or title_key in self._titles:
+      self.duplicates += 1
+      return False
+    signature = self._batch.hasher.signature(paper)
+    # A corpus match on the same id is that paper being updated, not a duplicate.
+    match = (self._batch.query(signature)
+             or (self.corpus.query(signature, exclude=paper["id"]) if self.corpus is not None else []))
+    if match:
+      self.near_duplicates += 1
+      logger.debug(f"Dropping {paper['id']}: near duplicate of {match[0][0]} (similarity {match[0][1]:.2f})")
+      return False
+    self._batch.add(paper["id"], signature)
+    self._ids.add(paper["id"])
+    self._titles.add(title_key)
+    self.papers.append(paper)
+    if len(self.papers) == 1:
+      logger.info(f"📄 First paper ready: {paper['id']}")
+    return True
@@ -0,0 +1,270 @@
+"""SQLite (WAL) archive of paper records shared by the pipeline, the API and the scripts."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from loguru import logger
+
+from tools.near_duplicates import NearDuplicateIndex, pack_signature, unpack_signature
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+  id TEXT PRIMARY KEY,
+  submitted_at TEXT NOT NULL,
+  payload TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_papers_submitted ON papers (submitted_at, id);
+CREATE TABLE IF NOT EXISTS paper_categories (
+  category TEXT NOT NULL,
+  paper_id TEXT NOT NULL REFERENCES papers (id) ON DELETE CASCADE,
+  submitted_at TEXT NOT NULL,
+  PRIMARY KEY (category, paper_id)
+);
+CREATE INDEX IF NOT EXISTS idx_categories_date ON paper_categories (category, submitted_at);
+CREATE INDEX IF NOT EXISTS idx_categories_paper ON paper_categories (paper_id);
+CREATE TABLE IF NOT EXISTS retired_papers (
+  id TEXT PRIMARY KEY,
+  version INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_retired_version ON retired_papers (version);
+CREATE TABLE IF NOT EXISTS paper_signatures (
+  paper_id TEXT PRIMARY KEY REFERENCES papers (id) ON DELETE CASCADE,
+  signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+  key TEXT PRIMARY KEY,
+  value TEXT NOT NULL
+);
+"""
+
+# Keeps "IN (...)" lookups under SQLite's bound-parameter limit.
+LOOKUP_CHUNK = 500
+
+
+def _canonical(paper: Dict[str, Any]) -> str:
+  return json.dumps(paper, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+
+
+class PaperRepository:
+  """Paper archive in SQLite with WAL journaling, so readers never block the daily writer."""
+
+  name = "paper_repository"
+
+  def __init__(self, path: Path) -> None:
+    self.path = Path(path)
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    self._local = threading.local()
+    self._near_duplicates: Optional[NearDuplicateIndex] = None
+    self._near_duplicates_lock = threading.Lock()
+    with self._connect() as conn:
+      conn.executescript(SCHEMA)
+      columns = {row[1] for row in conn.execute("PRAGMA table_info(papers)")}
+      if "version" not in columns:
+        # Archives created before versioned deltas: existing rows belong to the current version.
+        conn.execute("ALTER TABLE papers ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        conn.execute("UPDATE papers SET version = COALESCE("
+                     "(SELECT CAST(value AS INTEGER) FROM meta WHERE key = 'data_version'), 0)")
+      conn.execute("CREATE INDEX IF NOT EXISTS idx_papers_version ON papers (version)")
+
+  def run(self, operation: str, payload: Optional[List[Dict[str, Any]]] = None, **options: Any) -> Any:
+    if operation == "upsert":
+      return self.upsert_many(payload or [], retire_before=options.get("retire_before"))
+    if operation == "export":
+      return self.export_json()
+    if operation == "stats":
+      return self.stats()
+    if operation == "near_duplicates":
+      return self.near_duplicates()
+    raise ValueError(f"Unsupported operation {operation}")
+
+  def _connect(self) -> sqlite3.Connection:
+    conn = getattr(self._local, "conn", None)
+    if conn is None:
+      conn = sqlite3.connect(self.path, timeout=30)
+      conn.execute("PRAGMA journal_mode=WAL")
+      conn.execute("PRAGMA synchronous=NORMAL")
+      conn.execute("PRAGMA foreign_keys=ON")
+      self._local.conn = conn
+    return conn
+
+  def upsert_many(self, papers: Iterable[Dict[str, Any]], retire_before: Optional[str] = None) -> Dict[str, int]:
+    """Apply the delta between ``papers`` and the archive in one transaction.
+
+    Only new and changed records are written; with ``retire_before`` (YYYY-MM-DD) older papers
+    are retired. Returns inserted/updated/unchanged/retired counts and the resulting version.
+    """
+    incoming = {str(paper["id"]): paper for paper in papers if paper.get("id")}
+    if retire_before:
+      # Arrivals already past retention would only be inserted and retired in the same step.
+      incoming = {paper_id: paper for paper_id, paper in incoming.items()
+                  if str(paper.get("submittedAt", "")) >= retire_before}
+    conn = self._connect()
+    existing = self._payloads(conn, list(incoming))
+    now = datetime.now().isoformat(timespec="seconds")
+    rows = []
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0, "retired": 0}
+    for paper_id, paper in incoming.items():
+      payload = _canonical(paper)
+      if existing.get(paper_id) == payload:
+        counts["unchanged"] += 1
+        continue
+      counts["updated" if paper_id in existing else "inserted"] += 1
+      rows.append((paper_id, str(paper.get("submittedAt", "")), payload, now))
+    retiring = conn.execute("SELECT 1 FROM papers WHERE submitted_at < ? LIMIT 1",
+                            (retire_before,)).fetchone() if retire_before else None
+    if not rows and not retiring:
+      counts["version"] = self.data_version()
+      return counts
+    index = self._near_duplicates
+    signatures = [(row[0], index.hasher.signature(incoming[row[0]])) for row in rows] if index else []
+    retired_ids: List[str] = []
+    with conn:
+      # Bumping first takes the write lock, so concurrent writers never share a version.
+      conn.execute(
+          "INSERT INTO meta (key, value) VALUES ('data_version', '1') "
+          "ON CONFLICT (key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+      )
+      version = int(conn.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()[0])
+      conn.executemany(
+          "INSERT INTO papers (id, submitted_at, payload, updated_at, version) VALUES (?, ?, ?, ?, ?) "
+          "ON CONFLICT (id) DO UPDATE SET submitted_at = excluded.submitted_at, "
+          "payload = excluded.payload, updated_at = excluded.updated_at, version = excluded.version",
+          [row + (version,) for row in rows],
+      )
+      changed_ids = [(row[0],) for row in rows]
+      conn.executemany("DELETE FROM retired_papers WHERE id = ?", changed_ids)
+      conn.executemany("DELETE FROM paper_categories WHERE paper_id = ?", changed_ids)
+      conn.executemany(
+          "INSERT OR IGNORE INTO paper_categories (category, paper_id, submitted_at) VALUES (?, ?, ?)",
+          [(str(category), row[0], row[1]) for row in rows for category in incoming[row[0]].get("categories") or []],
+      )
+      # Stale signatures are dropped here and recomputed when the index is next loaded.
+      conn.executemany("DELETE FROM paper_signatures WHERE paper_id = ?", changed_ids)
+      conn.executemany("INSERT INTO paper_signatures (paper_id, signature) VALUES (?, ?)",
+                       [(paper_id, pack_signature(signature)) for paper_id, signature in signatures])
+      if retiring:
+        retired_ids = [row[0] for row in conn.execute(
+            "SELECT id FROM papers WHERE submitted_at < ?", (retire_before,))]
+        # Tombstones let clients holding an older version drop these papers too.
+        conn.executemany("INSERT OR REPLACE INTO retired_papers (id, version) VALUES (?, ?)",
+                         [(paper_id, version) for paper_id in retired_ids])
+        conn.execute("DELETE FROM papers WHERE submitted_at < ?", (retire_before,))
+    for paper_id, signature in signatures:
+      index.add(paper_id, signature)
+    for paper_id in retired_ids:
+      if index is not None:
+        index.remove(paper_id)
+    counts["retired"] = len(retired_ids)
+    counts["version"] = version
+    logger.info(f"PaperRepository upsert: {counts}")
+    return counts
+
+  def changes_since(self, version: int) -> Dict[str, Any]:
+    """Papers written and ids retired after ``version``, read from one consistent snapshot.
+
+    ``version`` 0 means the client has nothing yet, so every paper is returned.
+    """
+    conn = self._connect()
+    conn.execute("BEGIN")
+    try:
+      current = self.data_version()
+      papers = [json.loads(row[0]) for row in conn.execute(
+          "SELECT payload FROM papers WHERE version > ? OR ? = 0 ORDER BY submitted_at DESC, id DESC",
+          (version, version))]
+      retired = [row[0] for row in conn.execute(
+          "SELECT id FROM retired_papers WHERE version > ? ORDER BY id", (version,))]
+    finally:
+      conn.execute("COMMIT")
+    return {"version": current, "since_version": version, "papers": papers, "retired": retired}
+
+  def near_duplicates(self) -> NearDuplicateIndex:
+    """LSH index over every archived paper, loaded once from the stored MinHash signatures.
+
+    Papers without a signature (or with one from a different hash family) are hashed and
+    stored on first load; afterwards upserts keep the index current.
+    """
+    with self._near_duplicates_lock:
+      if self._near_duplicates is not None:
+        return self._near_duplicates
+      index = NearDuplicateIndex()
+      conn = self._connect()
+      row = conn.execute("SELECT value FROM meta WHERE key = 'signature_params'").fetchone()
+      with conn:
+        if row is None or row[0] != index.hasher.fingerprint:
+          conn.execute("DELETE FROM paper_signatures")
+          conn.execute("INSERT INTO meta (key, value) VALUES ('signature_params', ?) "
+                       "ON CONFLICT (key) DO UPDATE SET value = excluded.value", (index.hasher.fingerprint,))
+      for paper_id, blob in conn.execute("SELECT paper_id, signature FROM paper_signatures"):
+        index.add(paper_id, unpack_signature(blob))
+      missing = conn.execute(
+          "SELECT p.id, p.payload FROM papers p LEFT JOIN paper_signatures s ON s.paper_id = p.id "
+          "WHERE s.paper_id IS NULL").fetchall()
+      computed = [(paper_id, index.hasher.signature(json.loads(payload))) for paper_id, payload in missing]
+      with conn:
+        conn.executemany("INSERT INTO paper_signatures (paper_id, signature) VALUES (?, ?)",
+                         [(paper_id, pack_signature(signature)) for paper_id, signature in computed])
+      for paper_id, signature in computed:
+        index.add(paper_id, signature)
+      logger.info(f"Near-duplicate index loaded: {len(index)} papers ({len(computed)} newly hashed)")
+      self._near_duplicates = index
+      return index
+
+  def _payloads(self, conn: sqlite3.Connection, paper_ids: List[str]) -> Dict[str, str]:
+    found: Dict[str, str] = {}
+    for start in range(0, len(paper_ids), LOOKUP_CHUNK):
+      chunk = paper_ids[start:start + LOOKUP_CHUNK]
+      marks = ",".join("?" * len(chunk))
+      found.update(conn.execute(f"SELECT id, payload FROM papers WHERE id IN ({marks})", chunk).fetchall())
+    return found
+
+  def data_version(self) -> int:
+    """Counter bumped by every write that changed data; cheap enough to poll per request."""
+    row = self._connect().execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    return int(row[0]) if row else 0
+
+  def query(self, category: Optional[str] = None, date_from: Optional[str] = None,
+            date_to: Optional[str] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Papers newest first, filtered through the submitted_at and category indexes."""
+    if category is not None:
+      sql = ("SELECT p.payload FROM paper_categories c JOIN papers p ON p.id = c.paper_id "
+             "WHERE c.category = ?")
+      params: List[Any] = [category]
+      column = "c.submitted_at"
+    else:
+      sql, params, column = "SELECT p.payload FROM papers p WHERE 1 = 1", [], "p.submitted_at"
+    if date_from:
+      sql += f" AND {column} >= ?"
+      params.append(date_from)
+    if date_to:
+      sql += f" AND {column} <= ?"
+      params.append(date_to)
+    sql += f" ORDER BY {column} DESC, p.id DESC"
+    if limit is not None:
+      sql += " LIMIT ?"
+      params.append(limit)
+    return [json.loads(row[0]) for row in self._connect().execute(sql, params)]
+
+  def all_papers(self) -> List[Dict[str, Any]]:
+    return self.query()
+
+  def stats(self) -> Dict[str, Any]:
+    total, earliest, latest = self._connect().execute(
+        "SELECT COUNT(*), MIN(submitted_at), MAX(submitted_at) FROM papers").fetchone()
+    return {"total": total, "earliest": earliest, "latest": latest, "data_version": self.data_version()}
+
+  def export_json(self) -> str:
+    """JSON array in the papers.json format consumed by the Vite build."""
+    return json.dumps(self.all_papers(), indent=2, ensure_ascii=False)
+
+  def import_json(self, path: Path) -> Dict[str, int]:
+    """Seed the archive from an existing papers.json file, leaving out mock papers."""
+    papers = json.loads(Path(path).read_text(encoding="utf-8"))
+    return self.upsert_many(paper for paper in papers if not paper.get("mock"))
@@ -0,0 +1,105 @@
+"""Per-day and per-category-month static JSON shards plus a manifest, served to the frontend."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from loguru import logger
+
+from tools.file_manager import FileManager
+from tools.paper_records import DATE_PATTERN, valid_category
+
+MANIFEST_NAME = "manifest.json"
+# Shards dropped from the manifest stay this long, so a page holding the previous manifest can finish loading.
+STALE_SHARD_SECONDS = 24 * 3600
+
+
+def _sort_key(paper: Dict[str, Any]) -> Tuple[str, str]:
+  return str(paper.get("submittedAt", "")), str(paper.get("id", ""))
+
+
+class PaperShardPublisher:
+  """Writes ``days/<date>.<hash>.json`` and ``categories/<id>.<month>.<hash>.json`` plus ``manifest.json``.
+
+  Category shards are split by submission month so a category view loads only the months it
+  shows, however large the archive grows. Dates and category ids become file names, so papers
+  with a malformed date and categories outside ``paper_records.CATEGORY_PATTERN`` are left out.
+
+  Shard names embed their content hash, so browsers can cache them forever and only the small
+  manifest needs revalidation. Writes go through FileManager: unchanged shards are not touched,
+  and inside an open batch the manifest is renamed into place after the shards it lists.
+  """
+
+  name = "paper_shards"
+
+  def __init__(self, directory: Path, file_manager: FileManager) -> None:
+    self.directory = Path(directory)
+    self.file_manager = file_manager
+
+  def run(self, operation: str, papers: Iterable[Dict[str, Any]] = ()) -> Dict[str, Any]:
+    if operation == "publish":
+      return self.publish(papers)
+    raise ValueError(f"Unsupported operation {operation}")
+
+  def publish(self, papers: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    papers = sorted(papers, key=_sort_key, reverse=True)
+    by_day: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    by_category: Dict[str, Dict[str, List[Dict[str, Any]]]] = defaultdict(lambda: defaultdict(list))
+    skipped = 0
+    for paper in papers:
+      date = paper.get("submittedAt")
+      if not isinstance(date, str) or not DATE_PATTERN.fullmatch(date):
+        skipped += 1
+        continue
+      by_day[date].append(paper)
+      for category in paper.get("categories") or []:
+        if valid_category(category):
+          by_category[category][date[:7]].append(paper)
+        else:
+          skipped += 1
+    if skipped:
+      logger.warning(f"Left {skipped} malformed dates/categories out of the paper shards")
+
+    days = [{"date": date, **self._write_shard("days", date, by_day[date])}
+            for date in sorted(by_day, reverse=True)]
+    categories = []
+    for category in sorted(by_category):
+      months = [{"month": month, **self._write_shard("categories", f"{category}.{month}", papers_in_month)}
+                for month, papers_in_month in sorted(by_category[category].items(), reverse=True)]
+      categories.append({"id": category, "count": sum(month["count"] for month in months), "months": months})
+    shards = days + [month for category in categories for month in category["months"]]
+    manifest = {
+        "total": len(papers),
+        "latest": days[0]["date"] if days else None,
+        "days": days,
+        "categories": categories,
+    }
+    body = json.dumps(manifest, ensure_ascii=False, indent=2)
+    result = self.file_manager.run("write", str(self.directory / MANIFEST_NAME), body)
+    self._prune({entry["path"] for entry in shards})
+    logger.info(f"Published {len(days)} day and {len(shards) - len(days)} category-month shards "
+                f"for {len(categories)} categories ({result})")
+    return {"days": len(days), "categories": len(categories), "total": len(papers), "manifest": result}
+
+  def _write_shard(self, kind: str, key: str, papers: List[Dict[str, Any]]) -> Dict[str, Any]:
+    body = json.dumps(papers, ensure_ascii=False, separators=(",", ":"))
+    data = body.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    relative = f"{kind}/{key}.{digest}.json"
+    self.file_manager.run("write", str(self.directory / relative), body)
+    return {"count": len(papers), "bytes": len(data), "hash": digest, "path": relative}
+
+  def _prune(self, keep: set) -> None:
+    cutoff = time.time() - STALE_SHARD_SECONDS
+    for kind in ("days", "categories"):
+      folder = self.directory / kind
+      if not folder.is_dir():
+        continue
+      for shard in folder.glob("*.json"):
+        if f"{kind}/{shard.name}" not in keep and shard.stat().st_mtime < cutoff:
+          shard.unlink(missing_ok=True)
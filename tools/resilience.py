@@ -0,0 +1,252 @@
+"""Retry backoff with jitter, deadlines with cancellation and circuit breakers for calls to flaky endpoints."""
+
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional
+
+from loguru import logger
+
+from tools.metrics import BREAKER_TRANSITIONS
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+# Granularity at which Deadline.wait notices a cancellation.
+CANCEL_POLL_SECONDS = 0.1
+
+
+class CircuitOpenError(RuntimeError):
+  """Raised instead of calling an endpoint whose breaker is open."""
+
+  def __init__(self, breaker: "CircuitBreaker", retry_in: float) -> None:
+    super().__init__(f"circuit {breaker.name} is open after {breaker.failure_threshold} consecutive failures; "
+                     f"retrying in {retry_in:.1f}s")
+    self.breaker = breaker.name
+    self.retry_in = retry_in
+
+
+class DeadlineExceeded(TimeoutError):
+  """The overall deadline of a call ran out (possibly across several attempts)."""
+
+
+class Cancelled(RuntimeError):
+  """The deadline was cancelled before it ran out, e.g. because a newer run took over."""
+
+
+@dataclass
+class RetryPolicy:
+  """Exponential backoff with full jitter: attempt ``n`` waits uniform(0, min(max_delay, base * 2**n))."""
+
+  attempts: int = 3
+  base_delay: float = 0.5
+  max_delay: float = 8.0
+
+  def delay(self, attempt: int, rng: Optional[random.Random] = None) -> float:
+    ceiling = min(self.max_delay, self.base_delay * (2 ** attempt))
+    return (rng or random).uniform(0, ceiling)
+
+
+class Deadline:
+  """Absolute point in time that a call and all of its retries must finish by.
+
+  Deadlines nest: one created with a ``parent`` (a call inside a task, a task inside a run)
+  never outlasts it, and cancelling the parent cancels it too. ``seconds`` of None or 0 means
+  no limit of its own. One is created per task and per call, so it is kept to a few plain
+  attributes; cancellation is looked up through the (short) parent chain.
+  """
+
+  __slots__ = ("seconds", "parent", "limit", "_expires", "_reason")
+
+  def __init__(self, seconds: Optional[float], parent: Optional["Deadline"] = None) -> None:
+    self.seconds = seconds
+    self.parent = parent
+    self._reason: Optional[str] = None
+    self._expires = time.monotonic() + seconds if seconds else None
+    # Budget in seconds of whichever deadline in the chain expires first, for error messages.
+    self.limit = seconds
+    if parent is not None and parent._expires is not None and (
+        self._expires is None or parent._expires < self._expires):
+      self._expires, self.limit = parent._expires, parent.limit
+
+  def cancel(self, reason: Optional[str] = None) -> None:
+    """Cancel this deadline and every deadline nested in it; checks raise Cancelled from now on."""
+    if self._reason is None:
+      self._reason = reason or "cancelled"
+
+  @property
+  def reason(self) -> Optional[str]:
+    """Why this deadline or one it is nested in was cancelled; None while it is not."""
+    deadline = self
+    while deadline is not None:
+      if deadline._reason is not None:
+        return deadline._reason
+      deadline = deadline.parent
+    return None
+
+  @property
+  def cancelled(self) -> bool:
+    return self.reason is not None
+
+  def wait(self, seconds: float) -> bool:
+    """Sleep up to ``seconds``, waking early on cancellation; True if cancelled."""
+    ends = time.monotonic() + seconds
+    while not self.cancelled:
+      left = ends - time.monotonic()
+      if left <= 0:
+        return False
+      time.sleep(min(left, CANCEL_POLL_SECONDS))
+    return True
+
+  def remaining(self) -> Optional[float]:
+    if self._expires is None:
+      return None
+    return max(0.0, self._expires - time.monotonic())
+
+  def expired(self) -> bool:
+    remaining = self.remaining()
+    return remaining is not None and remaining <= 0
+
+  def cap(self, timeout: Optional[float]) -> Optional[float]:
+    """``timeout`` shortened to what is left of the deadline."""
+    remaining = self.remaining()
+    if remaining is None:
+      return timeout
+    return remaining if timeout is None else min(timeout, remaining)
+
+  def check(self, what: str) -> None:
+    if self.cancelled:
+      raise Cancelled(f"{what} cancelled: {self.reason}")
+    if self.expired():
+      raise DeadlineExceeded(f"{what} exceeded its {self.limit}s deadline")
+
+
+_current_deadline: ContextVar[Optional[Deadline]] = ContextVar("deadline", default=None)
+
+
+def current_deadline() -> Optional[Deadline]:
+  """Deadline of the task running in this context (copied into worker threads and event loops)."""
+  return _current_deadline.get()
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[Deadline]) -> Iterator[Optional[Deadline]]:
+  """Make ``deadline`` the current one for agents and tools called inside the block."""
+  token = _current_deadline.set(deadline)
+  try:
+    yield deadline
+  finally:
+    _current_deadline.reset(token)
+
+
+def check_deadline(what: str) -> None:
+  """Cooperative cancellation point: raise if the current deadline was cancelled or ran out."""
+  deadline = _current_deadline.get()
+  if deadline is not None:
+    deadline.check(what)
+
+
+class CircuitBreaker:
+  """Opens after ``failure_threshold`` consecutive failures and fails fast for ``reset_timeout`` seconds.
+
+  After that a single trial call is let through (half open): success closes the breaker,
+  failure opens it again for another ``reset_timeout``.
+  """
+
+  def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+    self.name = name
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self._lock = threading.Lock()
+    self._state = CLOSED
+    self._failures = 0
+    self._opened_at: Optional[float] = None
+    self._trial_in_flight = False
+    self._last_error: Optional[str] = None
+    self._times_opened = 0
+
+  @property
+  def state(self) -> str:
+    with self._lock:
+      return self._state
+
+  def _transition(self, state: str) -> None:
+    if state != self._state:
+      logger.warning(f"Circuit {self.name}: {self._state} -> {state}")
+      BREAKER_TRANSITIONS.inc(breaker=self.name, state=state)
+      self._state = state
+
+  def before_call(self) -> None:
+    """Raise CircuitOpenError unless a call may go through now."""
+    with self._lock:
+      if self._state == CLOSED:
+        return
+      retry_in = self._opened_at + self.reset_timeout - time.monotonic()
+      if self._state == OPEN and retry_in <= 0:
+        self._transition(HALF_OPEN)
+      if self._state == HALF_OPEN and not self._trial_in_flight:
+        self._trial_in_flight = True
+        return
+      raise CircuitOpenError(self, max(0.0, retry_in))
+
+  def record_success(self) -> None:
+    with self._lock:
+      self._failures = 0
+      self._trial_in_flight = False
+      self._transition(CLOSED)
+
+  def record_failure(self, error: BaseException) -> None:
+    with self._lock:
+      self._failures += 1
+      self._last_error = f"{type(error).__name__}: {error}"
+      trial_failed = self._state == HALF_OPEN
+      self._trial_in_flight = False
+      if trial_failed or (self._state == CLOSED and self._failures >= self.failure_threshold):
+        self._opened_at = time.monotonic()
+        self._times_opened += 1
+        self._transition(OPEN)
+
+  def release(self) -> None:
+    """End a call that neither succeeded nor failed at the endpoint (e.g. a rejected request)."""
+    with self._lock:
+      self._trial_in_flight = False
+
+  def snapshot(self) -> Dict[str, Any]:
+    with self._lock:
+      retry_in = None
+      if self._state == OPEN:
+        retry_in = round(max(0.0, self._opened_at + self.reset_timeout - time.monotonic()), 3)
+      return {
+          "name": self.name,
+          "state": self._state,
+          "consecutive_failures": self._failures,
+          "failure_threshold": self.failure_threshold,
+          "reset_timeout": self.reset_timeout,
+          "retry_in": retry_in,
+          "times_opened": self._times_opened,
+          "last_error": self._last_error,
+      }
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(name: str, failure_threshold: int = 5, reset_timeout: float = 30.0) -> CircuitBreaker:
+  """Process-wide breaker per endpoint name, created on first use."""
+  with _breakers_lock:
+    breaker = _breakers.get(name)
+    if breaker is None:
+      breaker = _breakers[name] = CircuitBreaker(name, failure_threshold, reset_timeout)
+    return breaker
+
+
+def breaker_snapshots() -> List[Dict[str, Any]]:
+  with _breakers_lock:
+    breakers = list(_breakers.values())
+  return [breaker.snapshot() for breaker in breakers]